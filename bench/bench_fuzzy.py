@@ -0,0 +1,153 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fuzzy import NameIndex
+from bulk import iter_bulk_file
+
+
+# Taken from what people actually type between brackets: exact names, lower
+# case, missing punctuation, partial names, abbreviations and typos, each with
+# the card that was meant
+QUERIES = [
+    ("Lightning Bolt", "Lightning Bolt"),
+    ("lightning bolt", "Lightning Bolt"),
+    ("bolt", "Lightning Bolt"),
+    ("lightening bolt", "Lightning Bolt"),
+    ("sol ring", "Sol Ring"),
+    ("Sol ring", "Sol Ring"),
+    ("jace tms", "Jace, the Mind Sculptor"),
+    ("jace, the mind sculptor", "Jace, the Mind Sculptor"),
+    ("jace the mind sculptor", "Jace, the Mind Sculptor"),
+    ("urza saga", "Urza's Saga"),
+    ("urzas saga", "Urza's Saga"),
+    ("thoughtsieze", "Thoughtseize"),
+    ("thoughtseize", "Thoughtseize"),
+    ("ragavan", "Ragavan, Nimble Pilferer"),
+    ("force of wil", "Force of Will"),
+    ("force of will", "Force of Will"),
+    ("delver", "Delver of Secrets // Insectile Aberration"),
+    ("delver of secrets", "Delver of Secrets // Insectile Aberration"),
+    ("insectile aberration", "Delver of Secrets // Insectile Aberration"),
+    ("aether vial", "Aether Vial"),
+    ("fire ice", "Fire // Ice"),
+    ("snapcaster", "Snapcaster Mage"),
+    ("counter spell", "Counterspell"),
+    ("brainstorm", "Brainstorm"),
+    ("swords", "Swords to Plowshares"),
+    ("stp", "Swords to Plowshares"),
+    ("dark confidant", "Dark Confidant"),
+    ("bob", "Dark Confidant"),
+    ("tarmogoyf", "Tarmogoyf"),
+    ("goyf", "Tarmogoyf"),
+    ("wrenn and six", "Wrenn and Six"),
+    ("w6", "Wrenn and Six"),
+    ("murktide", "Murktide Regent"),
+    ("murktide regent", "Murktide Regent"),
+    ("fury", "Fury"),
+    ("solitude", "Solitude"),
+    ("grief", "Grief"),
+    ("the one ring", "The One Ring"),
+    ("one ring", "The One Ring"),
+    ("orcish bowmasters", "Orcish Bowmasters"),
+    ("bowmasters", "Orcish Bowmasters"),
+    ("sheoldred the apocalypse", "Sheoldred, the Apocalypse"),
+    ("sheoldred", "Sheoldred, the Apocalypse"),
+    ("atraxa", "Atraxa, Praetors' Voice"),
+    ("craterhoof", "Craterhoof Behemoth"),
+    ("rhystic study", "Rhystic Study"),
+    ("smothering tithe", "Smothering Tithe"),
+    ("cyclonic rift", "Cyclonic Rift"),
+    ("dockside", "Dockside Extortionist"),
+    ("mana crypt", "Mana Crypt"),
+    ("lotus", "Black Lotus"),
+    ("black lotus", "Black Lotus"),
+    ("ancestral", "Ancestral Recall"),
+    ("time walk", "Time Walk"),
+    ("llanowar elf", "Llanowar Elves"),
+    ("birds of paradise", "Birds of Paradise"),
+    ("path to exile", "Path to Exile"),
+    ("fatal push", "Fatal Push"),
+    ("island", "Island"),
+    ("fog", "Fog"),
+    ("mountain", "Mountain"),
+    ("not a card at all", None),
+]
+
+
+def load_names(path):
+    if path.endswith(".json"):
+        return [card["name"] for card in iter_bulk_file(path)]
+
+    conn = sqlite3.connect(path)
+    return [name for (name,) in conn.execute("SELECT name FROM cards")]
+
+
+def score(index, fuzzy):
+    # Unresolved queries go to Scryfall, which costs a request; a wrong
+    # answer is a reply with the wrong card
+    correct = wrong = unresolved = 0
+
+    for query, expected in QUERIES:
+        result = index.lookup(query, fuzzy=fuzzy)
+        if result == expected:
+            correct += 1
+        elif result is None:
+            unresolved += 1
+        else:
+            wrong += 1
+
+    return (
+        f"{correct}/{len(QUERIES)} correct, {wrong} wrong, "
+        f"{unresolved} left to Scryfall"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python bench_fuzzy.py <bulk data file or bot.db>")
+        sys.exit(1)
+
+    names = load_names(sys.argv[1])
+
+    start = time.perf_counter()
+    index = NameIndex()
+    for name in names:
+        index.add(name)
+    print(
+        f"Indexed {len(index)} keys from {len(names)} names "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    rounds = 20
+    timings = []
+    for query, expected in QUERIES:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            result = index.lookup(query)
+        timings.append((time.perf_counter() - start) / rounds * 1e6)
+        mark = "ok" if result == expected else "WRONG" if result else "miss"
+        print(f"{query!r:32} {timings[-1]:9.1f}us  {mark:5}  {result}")
+
+    timings.sort()
+    print(
+        f"\nMedian {timings[len(timings) // 2]:.1f}us, "
+        f"p95 {timings[int(len(timings) * 0.95)]:.1f}us, max {timings[-1]:.1f}us"
+    )
+
+    # The bot only matches partial names and typos locally once a bulk
+    # ingest has indexed every name; with just the cards people have asked
+    # for, the closest indexed name is often a different card
+    partial = NameIndex()
+    meant = {expected for _, expected in QUERIES}
+    for name in names:
+        if name not in meant:
+            partial.add(name)
+
+    print(f"All loaded names, fuzzy:          {score(index, True)}")
+    print(f"All loaded names, exact only:     {score(index, False)}")
+    print(f"Cards meant left out, fuzzy:      {score(partial, True)}")
+    print(f"Cards meant left out, exact only: {score(partial, False)}")
@@ -0,0 +1,71 @@
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from parsing import QueryMatcher, parse_queries
+
+
+# A server's traffic is mostly ordinary chat, with the odd card call mixed in
+MESSAGES = [
+    "anyone up for some commander tonight?",
+    "lol that was brutal",
+    "I think the deck needs more removal tbh",
+    "check out [[Lightning Bolt]] in the new set",
+    "gg everyone",
+    "what do you all think of the new precons",
+    "[[Sol Ring]] [[Mana Crypt]] [[Arcane Signet]]",
+    "i'll be 10 min late, start without me",
+    "is [[Jace, the Mind Sculptor;set=2xm]] still banned in modern?",
+    "https://scryfall.com/card/lea/161/lightning-bolt",
+    "cube draft this weekend, bring sleeves",
+    "my list is at moxfield if anyone wants to look [at it]",
+    "[[delver]] flipped turn 2 again",
+    "no way, that's a misplay",
+    "should I cut [[Swords to Plowshares]] for [[Path to Exile]]?",
+    "brb",
+]
+
+
+def old_parse(wrapping, content):
+    # What on_message did before matchers were compiled and cached
+    left_split, right_split = wrapping.split("*")
+
+    if left_split and right_split not in content:
+        return []
+
+    regex = rf"{re.escape(left_split)}(.*?){re.escape(right_split)}"
+    return parse_queries(re.findall(regex, content))
+
+
+def new_parse(matcher, content):
+    raw_queries = matcher.findall(content)
+
+    if not raw_queries:
+        return []
+
+    return parse_queries(raw_queries)
+
+
+def run(label, func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in MESSAGES:
+            func(content)
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:10} {rounds * len(MESSAGES) / elapsed:12,.0f} messages/s")
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    wrapping = "[[*]]"
+    matcher = QueryMatcher(wrapping)
+
+    for content in MESSAGES:
+        assert old_parse(wrapping, content) == new_parse(matcher, content)
+
+    run("uncached", lambda content: old_parse(wrapping, content), rounds)
+    run("cached", lambda content: new_parse(matcher, content), rounds)
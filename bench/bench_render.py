@@ -0,0 +1,93 @@
+import asyncio
+from io import BytesIO
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from PIL import Image, ImageDraw
+
+from imagepool import image_pool
+from images import render_grid
+
+
+TICK = 0.001
+
+
+def make_card(seed, width=488, height=680):
+    # Busy line noise compresses about as badly as real card art does
+    rng = random.Random(seed)
+    card = Image.new("RGB", (width, height), (rng.randrange(256),) * 3)
+    draw = ImageDraw.Draw(card)
+    for _ in range(300):
+        draw.line(
+            [
+                (rng.randrange(width), rng.randrange(height)),
+                (rng.randrange(width), rng.randrange(height)),
+            ],
+            fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)),
+            width=3,
+        )
+
+    byte_arr = BytesIO()
+    card.save(byte_arr, format="JPEG", quality=90)
+    return byte_arr.getvalue()
+
+
+async def measure_stalls(render, grids):
+    # A ticker stands in for every other guild's messages and the gateway
+    # heartbeat; how late it wakes up is how long the loop was blocked
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            stalls.append(time.perf_counter() - start - TICK)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[render(grid) for grid in grids])
+    elapsed = time.perf_counter() - start
+
+    done.set()
+    await ticker_task
+
+    stalls.sort()
+    return (
+        elapsed,
+        stalls[len(stalls) // 2],
+        stalls[int(len(stalls) * 0.99)],
+        stalls[-1],
+    )
+
+
+async def render_inline(grid):
+    await asyncio.sleep(0)
+    return render_grid(grid)
+
+
+async def render_pooled(grid):
+    return await image_pool.run(render_grid, grid)
+
+
+async def main(count):
+    cards = [make_card(seed) for seed in range(10)]
+    grids = [cards] * count
+
+    for label, render in [("inline", render_inline), ("pooled", render_pooled)]:
+        elapsed, median, p99, worst = await measure_stalls(render, grids)
+        print(
+            f"{label:8} {count} grids in {elapsed:.2f}s, loop stall "
+            f"median {median * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms, "
+            f"max {worst * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
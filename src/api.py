@@ -1,132 +1,780 @@
-from io import BytesIO
+import asyncio
+from collections import Counter, defaultdict, namedtuple
 import json
 import os
-from time import sleep
 import datetime
-import sqlite3
-import requests
-from PIL import Image
-
 
+from autocomplete import AUTOCOMPLETE_LIMIT, AutocompleteCache, AutocompleteIndex
+from cache import LRUCache, NegativeCache
+from client import http_client
+from fuzzy import NameIndex, normalize_name
 from models import MagicCardRuling
-from images import img_to_bytearray, stitch_images_horz
+from imagepool import image_pool
+from images import make_thumbnail, stitch_faces
+from imagestore import image_store
+from ratelimit import rate_limiter
+from singleflight import SingleFlight
+import statements
+from storage import storage
 
 
-DB_NAME = os.getenv("DB_NAME", default="bot.db")
 REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", default=24))
+STALE_WHILE_REVALIDATE = os.getenv("STALE_WHILE_REVALIDATE", default="true") == "true"
+MAX_STALENESS = int(os.getenv("MAX_STALENESS", default=24 * 7))
+CARD_CACHE_MB = float(os.getenv("CARD_CACHE_MB", default=64))
+COMPOSITE_CACHE_MB = float(os.getenv("COMPOSITE_CACHE_MB", default=16))
+RULINGS_REFRESH_INTERVAL = int(os.getenv("RULINGS_REFRESH_INTERVAL", default=24 * 7))
+RULINGS_CACHE_MB = float(os.getenv("RULINGS_CACHE_MB", default=8))
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", default=60))
+NEGATIVE_CACHE_SIZE = int(os.getenv("NEGATIVE_CACHE_SIZE", default=10000))
+AUTOCOMPLETE_FALLBACK = os.getenv("AUTOCOMPLETE_FALLBACK", default="true") == "true"
+AUTOCOMPLETE_CACHE_TTL = int(os.getenv("AUTOCOMPLETE_CACHE_TTL", default=60))
+AUTOCOMPLETE_CACHE_SIZE = int(os.getenv("AUTOCOMPLETE_CACHE_SIZE", default=5000))
+COLLECTION_SIZE = 75  # Scryfall's limit on identifiers per /cards/collection
+AUTOCOMPLETE_SIZE = 20  # Scryfall's limit on names per /cards/autocomplete
+
+# Objects that share names with real cards or carry no playable card data
+SKIPPED_LAYOUTS = ["token", "double_faced_token", "emblem", "art_series"]
+
+# Double-faced cards have face image hashes instead of a single image
+CachedCard = namedtuple(
+    "CachedCard", ["raw_card", "image", "faces", "last_refreshed", "thumbnail"]
+)
 
 
 class ScryfallAPI:
     def __init__(self):
         self.base_uri = "https://api.scryfall.com"
 
-        self.conn = sqlite3.connect(
-            f"../{DB_NAME}", detect_types=sqlite3.PARSE_DECLTYPES
+        self.refreshing = {}
+        self.in_flight = SingleFlight()
+        self.hits = Counter()
+        self.card_cache = LRUCache(int(CARD_CACHE_MB * 1024 * 1024))
+        self.composite_cache = LRUCache(int(COMPOSITE_CACHE_MB * 1024 * 1024))
+        self.rulings_cache = LRUCache(int(RULINGS_CACHE_MB * 1024 * 1024))
+        self.negative_cache = NegativeCache(
+            storage,
+            datetime.timedelta(minutes=NEGATIVE_CACHE_TTL),
+            NEGATIVE_CACHE_SIZE,
+        )
+
+        names = [name for (name,) in storage.query(statements.SELECT_ALL_NAMES)]
+        self.names_complete = bool(storage.query(statements.SELECT_BULK_INGEST))
+
+        self.name_index = NameIndex()
+        for name in names:
+            self.name_index.add(name)
+
+        self.autocomplete_index = AutocompleteIndex()
+        self.autocomplete_index.build(names)
+        self.autocomplete_cache = AutocompleteCache(
+            AUTOCOMPLETE_CACHE_TTL * 60, AUTOCOMPLETE_CACHE_SIZE
         )
-        self.cursor = self.conn.cursor()
+        self.autocomplete_stats = defaultdict(Counter)
 
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS cards
-            (name text UNIQUE, raw_card text, image blob, last_refreshed timestamp)
-        """
+    async def get_cards(self, queries):
+        cards = await asyncio.gather(
+            *[self._get_cached_card(query) for query in queries]
         )
-        self.conn.commit()
 
-    def get_cards(self, queries):
-        cards = []
+        # Names Scryfall recently told us don't exist are not asked about again
+        misses = [
+            idx
+            for idx, card in enumerate(cards)
+            if card is None
+            and not self.negative_cache.contains(self._get_miss_key(queries[idx]))
+        ]
+
+        if len(misses) > 1:
+            # Several cold names in one message go out as a single batch, and
+            # only the identifiers Scryfall can't match exactly fall back to
+            # the fuzzy endpoint below
+            raw_cards = await self._fetch_collection([queries[idx] for idx in misses])
+        else:
+            raw_cards = [None] * len(misses)
+
+        pending = list(zip(misses, raw_cards))
+
+        # Cards only known from a bulk ingest still need their image fetched
+        pending += [
+            (idx, card.raw_card)
+            for idx, card in enumerate(cards)
+            if card is not None and card.image is None and card.faces is None
+        ]
+
+        # Every remaining fetch in a message runs at once; the shared rate
+        # limiter in the HTTP client keeps the fan-out within budget
+        results = await asyncio.gather(
+            *[self._fetch_card(queries[idx], raw_card) for idx, raw_card in pending]
+        )
+        for (idx, _), card in zip(pending, results):
+            cards[idx] = card
+
+        # Images saved before thumbnails existed get one the first time
+        # they're shown, without downloading the image again. This runs after
+        # the fetches, since a fetch can also answer with such a card
+        thumbnails = [
+            idx
+            for idx, card in enumerate(cards)
+            if card is not None and card.thumbnail is None
+        ]
+        results = await asyncio.gather(
+            *[self._add_thumbnail(queries[idx], cards[idx]) for idx in thumbnails]
+        )
+        for idx, card in zip(thumbnails, results):
+            cards[idx] = card
+
+        for query, card in zip(queries, cards):
+            if card is not None:
+                self.hits[(card.raw_card["name"], self._get_set_code(query) or "")] += 1
+
+        return [card for card in cards if card is not None]
+
+    def _get_query_params(self, query):
         accepted_params = ["set"]
+        payload = {}
+
+        for param in query.get("params") or []:
+            for key in param:
+                if key in accepted_params and param[key]:
+                    payload[key] = param[key].strip().lower()
+
+        return payload
+
+    def _get_set_code(self, query):
+        return self._get_query_params(query).get("set")
+
+    def _get_miss_key(self, query):
+        return (normalize_name(query["card_name"]), self._get_set_code(query))
+
+    async def _get_cached_card(self, query):
+        # Single faces and differences in case and punctuation are resolved
+        # to a known card name in memory, so only names we actually have reach
+        # SQLite. Typos and partial names are left to Scryfall unless a bulk
+        # ingest has put every name in the index
+        name = self.name_index.lookup(query["card_name"], fuzzy=self.names_complete)
+        if name is None:
+            return None
+
+        set_code = self._get_set_code(query)
+        cached = self.card_cache.get((normalize_name(name), set_code))
+
+        if cached is None:
+            loaded = await storage.read(self._load_card, name, set_code)
+            if loaded is None:
+                return None
+
+            raw_card_text, image, faces, last_refreshed, thumbnail = loaded
+            cached = self._cache_card(
+                json.loads(raw_card_text),
+                set_code,
+                image,
+                faces,
+                thumbnail,
+                last_refreshed,
+                len(raw_card_text),
+            )
+
+        raw_card, image, faces, last_refreshed, _ = cached
+        age = datetime.datetime.now() - last_refreshed
+
+        # Cards only known from a bulk ingest are kept up to date by the next
+        # ingest, so however old they are only their image is fetched
+        if image is None and faces is None:
+            return cached
+
+        if age < datetime.timedelta(hours=REFRESH_INTERVAL):
+            return cached
+
+        # Expired cards are still served as they are while a background task
+        # refreshes them, unless they are past the hard staleness limit
+        if STALE_WHILE_REVALIDATE and age < datetime.timedelta(hours=MAX_STALENESS):
+            self._schedule_refresh(raw_card["name"], set_code)
+            return cached
+
+        return None
+
+    def _load_card(self, name, set_code):
+        # Runs on a reader thread, so neither the row nor the image files are
+        # read on the event loop. Lookups for a specific set are cached per
+        # printing, separately from the printing a plain name lookup resolved to
+        if set_code is None:
+            rows = storage.query(statements.SELECT_CARD, [normalize_name(name)])
+        else:
+            rows = storage.query(
+                statements.SELECT_PRINTING, [normalize_name(name), set_code]
+            )
+
+        if not rows:
+            return None
+
+        raw_card_text, image_hash, face_hashes, last_refreshed, thumb_hash = rows[0]
+
+        # A missing file just means the image gets downloaded again
+        image = None
+        if image_hash is not None:
+            image = image_store.get(image_hash)
+
+        faces = None
+        if face_hashes is not None:
+            face_hashes = tuple(json.loads(face_hashes))
+            if all(image_store.exists(digest) for digest in face_hashes):
+                faces = face_hashes
+
+        thumbnail = None
+        if (image is not None or faces is not None) and thumb_hash is not None:
+            thumbnail = image_store.get(thumb_hash)
 
+        return raw_card_text, image, faces, last_refreshed, thumbnail
+
+    def _schedule_refresh(self, name, set_code):
+        key = (normalize_name(name), set_code)
+        if key in self.refreshing:
+            return
+
+        task = asyncio.create_task(self.refresh_card(name, set_code))
+        self.refreshing[key] = task
+        task.add_done_callback(lambda _: self.refreshing.pop(key, None))
+
+    async def refresh_card(self, name, set_code=None):
+        query = {"card_name": name}
+        if set_code is not None:
+            query["params"] = [{"set": set_code}]
+
+        try:
+            await self._fetch_card(query, refresh=True)
+        except Exception as e:
+            print(f"Background refresh of {name} failed: {e}")
+
+    def _cache_card(
+        self, raw_card, set_code, image, faces, thumbnail, last_refreshed, raw_card_size
+    ):
+        # Sized by the stored JSON text plus image bytes, which is close
+        # enough to keep the cache within its budget
+        cached = CachedCard(raw_card, image, faces, last_refreshed, thumbnail)
+        size = raw_card_size + sum(
+            len(data) for data in [image, thumbnail] if data is not None
+        )
+        key = (normalize_name(raw_card["name"]), set_code)
+
+        self.card_cache.put(key, cached, size)
+
+        return cached
+
+    async def _fetch_collection(self, queries):
+        # Names that only differ in case or punctuation are asked for once
+        identifiers = {}
         for query in queries:
-            query_response = None
-
-            if not query.get("params"):
-                self.cursor.execute(
-                    """
-                    SELECT raw_card, image, last_refreshed FROM cards WHERE name LIKE ?
-                """,
-                    [query["card_name"]],
-                )
-                query_response = self.cursor.fetchone()
+            key = self._get_miss_key(query)
+            if key not in identifiers:
+                identifier = {"name": query["card_name"].strip()}
+                identifier.update(self._get_query_params(query))
+                identifiers[key] = identifier
 
-            if query_response is not None:
-                if (datetime.datetime.now() - query_response[2]) < datetime.timedelta(
-                    hours=REFRESH_INTERVAL
-                ):
-                    cards.append([json.loads(query_response[0]), query_response[1]])
-                    continue
-
-            payload = {"fuzzy": query["card_name"]}
-            if query.get("params"):
-                for param in query["params"]:
-                    for key in param:
-                        if key in accepted_params:
-                            payload[key] = param[key]
-
-            card_request = requests.get(f"{self.base_uri}/cards/named", params=payload)
-            sleep(0.25)  # TODO better rate limiting
-
-            if card_request.status_code == 404:
-                print(f"Card with name {query['card_name']} not found. Skipping")
+        unique_identifiers = list(identifiers.values())
+        found = {}
+
+        for idx in range(0, len(unique_identifiers), COLLECTION_SIZE):
+            batch = unique_identifiers[idx : idx + COLLECTION_SIZE]
+            collection_request = await http_client.post(
+                f"{self.base_uri}/cards/collection", json_body={"identifiers": batch}
+            )
+
+            if collection_request.status_code != 200:
+                # Let every query of this batch take the fuzzy path instead
                 continue
 
-            raw_card = card_request.json()
-
-            normal_image_url = None
-            if raw_card.get("image_uris") is None:
-                images = []
-                for face in raw_card["card_faces"]:
-                    image_url = face["image_uris"]["normal"]
-                    image_resp = requests.get(image_url)
-                    face_image = Image.open(BytesIO(image_resp.content))
-                    images.append(face_image)
-                image = img_to_bytearray(stitch_images_horz(images, buf_horz=10))
+            # Cards are matched back to queries by name and set rather than
+            # by position, since one card can answer several identifiers and
+            # a single face's name finds the whole card
+            for raw_card in collection_request.json()["data"]:
+                names = [raw_card["name"]] + [
+                    face["name"] for face in raw_card.get("card_faces", [])
+                ]
+                for name in names:
+                    found.setdefault((normalize_name(name), None), raw_card)
+                    found.setdefault(
+                        (normalize_name(name), raw_card.get("set")), raw_card
+                    )
+
+        return [found.get(self._get_miss_key(query)) for query in queries]
+
+    async def _fetch_card(self, query, raw_card=None, refresh=False):
+        # A card that many people ask for at once is only looked up,
+        # downloaded and written once, and every caller gets that result
+        if raw_card is None:
+            raw_card = await self.in_flight.do(
+                ("named",) + self._get_miss_key(query),
+                lambda: self._fetch_named(query),
+            )
+
+            if raw_card is None:
+                return None
+
+        set_code = self._get_set_code(query)
+
+        # Once Scryfall has said which card a partial name meant, a copy we
+        # already have with its image saves downloading it again
+        if not refresh:
+            cached = await self._get_cached_card(
+                dict(query, card_name=raw_card["name"])
+            )
+            if cached is not None and (
+                cached.image is not None or cached.faces is not None
+            ):
+                return cached
+
+        return await self.in_flight.do(
+            ("card", normalize_name(raw_card["name"]), set_code),
+            lambda: self._fetch_image(raw_card, set_code),
+        )
+
+    async def _fetch_named(self, query):
+        payload = {"fuzzy": query["card_name"]}
+        payload.update(self._get_query_params(query))
+
+        card_request = await http_client.get(
+            f"{self.base_uri}/cards/named", params=payload
+        )
+
+        if card_request.status_code == 404:
+            print(f"Card with name {query['card_name']} not found. Skipping")
+            self.negative_cache.add(self._get_miss_key(query))
+            return None
+
+        # Anything else that isn't a card (rate limiting, server errors,
+        # timeouts) only costs this query, and isn't remembered as a miss
+        if card_request.status_code != 200:
+            print(
+                f"Looking up {query['card_name']} failed "
+                f"with status {card_request.status_code}. Skipping"
+            )
+            return None
+
+        return card_request.json()
+
+    async def _fetch_image(self, raw_card, set_code):
+        if raw_card.get("image_uris") is None:
+            # Faces are kept exactly as downloaded; the side by side version
+            # is only drawn when a reply actually needs it
+            face_requests = await asyncio.gather(
+                *[
+                    http_client.get(face["image_uris"]["normal"])
+                    for face in raw_card["card_faces"]
+                ]
+            )
+            if any(request.status_code != 200 for request in face_requests):
+                print(f"Downloading {raw_card['name']} failed. Skipping")
+                return None
+
+            image = None
+            faces = [face_request.content for face_request in face_requests]
+        else:
+            normal_image_url = raw_card["image_uris"]["normal"]
+            image_request = await http_client.get(normal_image_url)
+
+            if image_request.status_code != 200:
+                print(f"Downloading {raw_card['name']} failed. Skipping")
+                return None
+
+            image = bytearray(image_request.content)
+            faces = None
+
+        # Pillow raises OSError for anything it can't decode, like an error
+        # page served in place of an image. The thumbnail is drawn before any
+        # file is written, so nothing undecodable gets stored
+        try:
+            return await self._store_card(raw_card, set_code, image, faces)
+        except OSError as e:
+            print(f"Decoding {raw_card['name']} failed: {e}. Skipping")
+            return None
+
+    async def get_image(self, card):
+        if card.image is not None:
+            return card.image
+
+        composite = self.composite_cache.get(card.faces)
+
+        if composite is None:
+            composite = await image_pool.run(self._stitch_stored_faces, card.faces)
+            self.composite_cache.put(card.faces, composite, len(composite))
+
+        return composite
+
+    def _stitch_stored_faces(self, face_hashes):
+        return stitch_faces([image_store.get(digest) for digest in face_hashes])
+
+    def _save_thumbnail(self, image, face_hashes):
+        if image is not None:
+            sources = [bytes(image)]
+        else:
+            sources = [image_store.get(digest) for digest in face_hashes]
+
+        thumbnail = make_thumbnail(sources)
+        return thumbnail, image_store.put(thumbnail)
+
+    def _save_images(self, image, faces):
+        # Grids only ever draw the small version, so it is made once here
+        # rather than every time the card shows up in one
+        thumbnail = make_thumbnail(faces if image is None else [bytes(image)])
+        thumb_hash = image_store.put(thumbnail)
+
+        image_hash = None
+        if image is not None:
+            image_hash = image_store.put(bytes(image))
+
+        face_hashes = None
+        if faces is not None:
+            face_hashes = tuple(image_store.put(face) for face in faces)
+
+        return thumbnail, thumb_hash, image_hash, face_hashes
+
+    async def _add_thumbnail(self, query, card):
+        set_code = self._get_set_code(query)
+        name = card.raw_card["name"]
+
+        # Images stored before downloads were checked can be error pages
+        # rather than images; those are dropped and downloaded again
+        try:
+            thumbnail, thumb_hash = await image_pool.run(
+                self._save_thumbnail, card.image, card.faces
+            )
+        except OSError as e:
+            print(f"Decoding stored {name} failed: {e}. Downloading it again")
+
+            if set_code is None:
+                storage.submit(statements.CLEAR_CARD_IMAGES, [name])
             else:
-                normal_image_url = raw_card["image_uris"]["normal"]
-                image_request = requests.get(normal_image_url)
-                sleep(0.25)
-                image = bytearray(image_request.content)
-
-            if not query.get("params"):
-                self.cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO cards VALUES (?,?,?,?)
-                """,
-                    [
-                        raw_card["name"],
-                        json.dumps(raw_card),
-                        image,
-                        datetime.datetime.now(),
-                    ],
+                storage.submit(statements.CLEAR_PRINTING_IMAGES, [name, set_code])
+            self.card_cache.invalidate((normalize_name(name), set_code))
+
+            return await self._fetch_card(query, card.raw_card, refresh=True)
+
+        if set_code is None:
+            storage.submit(statements.UPDATE_CARD_THUMBNAIL, [thumb_hash, name])
+        else:
+            storage.submit(
+                statements.UPDATE_PRINTING_THUMBNAIL,
+                [thumb_hash, name, set_code],
+            )
+
+        return self._cache_card(
+            card.raw_card,
+            set_code,
+            card.image,
+            card.faces,
+            thumbnail,
+            card.last_refreshed,
+            len(json.dumps(card.raw_card)),
+        )
+
+    async def _store_card(self, raw_card, set_code, image, faces):
+        # The thumbnail is drawn and every file written on the image pool,
+        # off the event loop
+        thumbnail, thumb_hash, image_hash, face_hashes = await image_pool.run(
+            self._save_images, image, faces
+        )
+        raw_card_text = json.dumps(raw_card)
+        last_refreshed = datetime.datetime.now()
+
+        # The write is queued rather than waited on; until it lands the
+        # card is served from the in-memory cache
+        if set_code is None:
+            storage.submit(
+                statements.INSERT_CARD,
+                [
+                    raw_card["name"],
+                    raw_card_text,
+                    image_hash,
+                    json.dumps(face_hashes) if face_hashes else None,
+                    thumb_hash,
+                    last_refreshed,
+                    raw_card.get("id"),
+                    normalize_name(raw_card["name"]),
+                ],
+            )
+        else:
+            storage.submit(
+                statements.INSERT_PRINTING,
+                [
+                    raw_card["name"],
+                    set_code,
+                    raw_card_text,
+                    image_hash,
+                    json.dumps(face_hashes) if face_hashes else None,
+                    thumb_hash,
+                    last_refreshed,
+                    raw_card.get("id"),
+                    normalize_name(raw_card["name"]),
+                ],
+            )
+
+        self._index_name(raw_card["name"])
+        return self._cache_card(
+            raw_card,
+            set_code,
+            image,
+            face_hashes,
+            thumbnail,
+            last_refreshed,
+            len(raw_card_text),
+        )
+
+    async def ingest_cards(self, raw_cards):
+        now = datetime.datetime.now()
+
+        rowcount = await storage.execute(
+            statements.UPSERT_BULK_CARD,
+            [
+                (
+                    raw_card["name"],
+                    json.dumps(raw_card),
+                    now,
+                    raw_card.get("id"),
+                    normalize_name(raw_card["name"]),
                 )
-                self.conn.commit()
-            cards.append((raw_card, image))
+                for raw_card in raw_cards
+            ],
+            many=True,
+        )
+
+        for raw_card in raw_cards:
+            self._index_name(raw_card["name"])
+            self.card_cache.invalidate((normalize_name(raw_card["name"]), None))
 
-        return cards
+        return rowcount
 
-    def get_rulings(self, rulings_uri):
-        ruling_request = requests.get(rulings_uri)
+    async def flush_hits(self):
+        if not self.hits:
+            return
 
-        if ruling_request.status_code == 200:
-            raw_rulings = ruling_request.json()
-            rulings = []
+        # Hits recorded while the write is in progress go into a fresh counter
+        pending_hits, self.hits = self.hits, Counter()
+        now = datetime.datetime.now()
+        await storage.execute(
+            statements.UPSERT_CARD_HITS,
+            [
+                (name, set_code, hits, now)
+                for (name, set_code), hits in pending_hits.items()
+            ],
+            many=True,
+        )
 
-            for ruling in raw_rulings["data"]:
-                rulings.append(MagicCardRuling(**ruling))
+    async def get_expiring_cards(self, limit, within):
+        # Cards that have expired or will before the next check
+        cutoff = (
+            datetime.datetime.now()
+            - datetime.timedelta(hours=REFRESH_INTERVAL)
+            + within
+        )
 
-            return rulings
+        rows = await storage.fetchall(
+            statements.SELECT_EXPIRING_CARDS,
+            [limit - 1, cutoff],
+        )
 
-        else:
+        return [(name, set_code or None) for name, set_code in rows]
+
+    async def get_new_sets(self, days):
+        sets_request = await http_client.get(f"{self.base_uri}/sets")
+
+        if sets_request.status_code != 200:
             return []
 
-    def get_autocomplete(self, partial_name):
+        today = datetime.date.today()
+        warmed = [
+            code for (code,) in await storage.fetchall(statements.SELECT_WARMED_SETS)
+        ]
+
+        return [
+            card_set["code"]
+            for card_set in sets_request.json()["data"]
+            if card_set.get("released_at")
+            and not card_set.get("digital")
+            and card_set["code"] not in warmed
+            and 0
+            <= (today - datetime.date.fromisoformat(card_set["released_at"])).days
+            <= days
+        ]
+
+    async def ingest_set(self, set_code, max_requests):
+        next_page = f"{self.base_uri}/cards/search?q=e%3A{set_code}"
+        requests_made = 0
+
+        while next_page is not None:
+            if requests_made >= max_requests:
+                return requests_made
+
+            search_request = await http_client.get(next_page)
+            requests_made += 1
+
+            if search_request.status_code != 200:
+                return requests_made
+
+            results = search_request.json()
+            await self.ingest_cards(
+                [
+                    raw_card
+                    for raw_card in results["data"]
+                    if raw_card.get("layout") not in SKIPPED_LAYOUTS
+                ]
+            )
+            next_page = results.get("next_page") if results.get("has_more") else None
+
+        await storage.execute(statements.INSERT_WARMED_SET, [set_code])
+
+        return requests_made
+
+    async def record_bulk_ingest(self, total):
+        await storage.execute(
+            statements.INSERT_BULK_INGEST, [datetime.datetime.now(), total]
+        )
+        self.names_complete = True
+
+    def _index_name(self, name):
+        self.name_index.add(name)
+        self.autocomplete_index.add(name)
+
+    def stats(self):
+        autocomplete = {
+            handler: (
+                f"{stats['local'] + stats['cached']}/{stats['requests']} "
+                f"answered without Scryfall"
+            )
+            for handler, stats in self.autocomplete_stats.items()
+        }
+
+        return {
+            "Autocomplete": autocomplete,
+            "Card cache": self.card_cache.stats(),
+            "Composite cache": self.composite_cache.stats(),
+            "Rulings cache": self.rulings_cache.stats(),
+            "Not found cache": self.negative_cache.stats(),
+            "Rate limiter queue": rate_limiter.queue_depth(),
+            "Background refreshes": {"running": len(self.refreshing)},
+            "Coalesced fetches": self.in_flight.stats(),
+            "Image pool": image_pool.stats(),
+            "Database": storage.stats(),
+        }
+
+    async def get_raw_card(self, query):
+        # For commands that only need a card's data, like rulings: a card
+        # known locally is answered without downloading its image
+        cached = await self._get_cached_card(query)
+        if cached is not None:
+            return cached.raw_card
+
+        if self.negative_cache.contains(self._get_miss_key(query)):
+            return None
+
+        return await self.in_flight.do(
+            ("named",) + self._get_miss_key(query),
+            lambda: self._fetch_named(query),
+        )
+
+    async def get_rulings(self, raw_card):
+        # Rulings belong to the oracle card, so every printing shares them
+        oracle_id = raw_card.get("oracle_id") or raw_card["card_faces"][0]["oracle_id"]
+        cached = self.rulings_cache.get(oracle_id)
+
+        if cached is None:
+            query_response = await storage.fetchone(
+                statements.SELECT_RULINGS, [oracle_id]
+            )
+
+            if query_response is not None:
+                cached = self._cache_rulings(
+                    oracle_id,
+                    json.loads(query_response[0]),
+                    query_response[1],
+                    len(query_response[0]),
+                )
+
+        if cached is None or datetime.datetime.now() - cached[1] >= datetime.timedelta(
+            hours=RULINGS_REFRESH_INTERVAL
+        ):
+            ruling_request = await http_client.get(raw_card["rulings_uri"])
+
+            if ruling_request.status_code == 200:
+                raw_rulings = ruling_request.json()["data"]
+                await self.ingest_rulings({oracle_id: raw_rulings})
+                cached = self._cache_rulings(
+                    oracle_id,
+                    raw_rulings,
+                    datetime.datetime.now(),
+                    len(json.dumps(raw_rulings)),
+                )
+
+            # Rulings rarely change, so if the refresh fails the ones already
+            # stored are still worth showing
+            elif cached is None:
+                return []
+
+        return [MagicCardRuling(**ruling) for ruling in cached[0]]
+
+    def _cache_rulings(self, oracle_id, raw_rulings, last_refreshed, size):
+        cached = (raw_rulings, last_refreshed)
+        self.rulings_cache.put(oracle_id, cached, size)
+
+        return cached
+
+    async def ingest_rulings(self, rulings_by_oracle_id):
+        now = datetime.datetime.now()
+        rows = [
+            (oracle_id, json.dumps(raw_rulings), now)
+            for oracle_id, raw_rulings in rulings_by_oracle_id.items()
+        ]
+
+        await storage.execute(statements.INSERT_RULINGS, rows, many=True)
+
+        for oracle_id in rulings_by_oracle_id:
+            self.rulings_cache.invalidate(oracle_id)
+
+        return len(rows)
+
+    async def get_autocomplete(self, partial_name, handler=None):
+        stats = self.autocomplete_stats[handler]
+        stats["requests"] += 1
+
+        local_names = self.autocomplete_index.search(partial_name)
+
+        # Until a bulk ingest has indexed every card, a short local list is
+        # only the cards the bot has seen, so Scryfall's matches are added
+        if not AUTOCOMPLETE_FALLBACK or (
+            local_names
+            and (self.names_complete or len(local_names) >= AUTOCOMPLETE_LIMIT)
+        ):
+            stats["local"] += 1
+            return local_names
+
+        names = self.autocomplete_cache.get(partial_name)
+
+        if names is not None:
+            stats["cached"] += 1
+        else:
+            names = await self._fetch_autocomplete(partial_name)
+
+        names = local_names + [name for name in names if name not in local_names]
+        return names[:AUTOCOMPLETE_LIMIT]
+
+    async def _fetch_autocomplete(self, partial_name):
         params = {"q": partial_name}
 
-        autocomplete_request = requests.get(
-            self.base_uri + "/cards/autocomplete", params
+        autocomplete_request = await http_client.get(
+            self.base_uri + "/cards/autocomplete", params=params
+        )
+
+        if autocomplete_request.status_code != 200:
+            return []
+
+        # total_values only counts the names returned, so a list is known to
+        # hold every match only when it is shorter than Scryfall's cap
+        catalog = autocomplete_request.json()
+        self.autocomplete_cache.put(
+            partial_name, catalog["data"], len(catalog["data"]) < AUTOCOMPLETE_SIZE
         )
 
-        return autocomplete_request.json()
+        return catalog["data"]
 
 
 scryfall_api = ScryfallAPI()
@@ -0,0 +1,115 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import time
+
+from fuzzy import normalize_name
+
+
+AUTOCOMPLETE_LIMIT = 25  # Discord's cap on autocomplete choices
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self.known = set()
+        # (normalized name, name) for matches from the start of the name, and
+        # (normalized tail, name) starting at every later word, so "bolt"
+        # also finds Lightning Bolt after the names that begin with it
+        self.names = []
+        self.words = []
+
+    def __len__(self):
+        return len(self.known)
+
+    def _entries(self, name):
+        tokens = normalize_name(name).split(" ")
+
+        name_entry = (" ".join(tokens), name)
+        word_entries = [(" ".join(tokens[idx:]), name) for idx in range(1, len(tokens))]
+
+        return name_entry, word_entries
+
+    def add(self, name):
+        if name in self.known:
+            return
+        self.known.add(name)
+
+        name_entry, word_entries = self._entries(name)
+        insort(self.names, name_entry)
+        for entry in word_entries:
+            insort(self.words, entry)
+
+    def build(self, names):
+        for name in names:
+            if name in self.known:
+                continue
+            self.known.add(name)
+
+            name_entry, word_entries = self._entries(name)
+            self.names.append(name_entry)
+            self.words.extend(word_entries)
+
+        self.names.sort()
+        self.words.sort()
+
+    def _scan(self, entries, prefix, results, limit):
+        idx = bisect_left(entries, (prefix,))
+
+        while idx < len(entries) and len(results) < limit:
+            key, name = entries[idx]
+            if not key.startswith(prefix):
+                break
+            if name not in results:
+                results.append(name)
+            idx += 1
+
+    def search(self, partial_name, limit=AUTOCOMPLETE_LIMIT):
+        prefix = normalize_name(partial_name)
+        if not prefix:
+            return []
+
+        results = []
+        self._scan(self.names, prefix, results, limit)
+        self._scan(self.words, prefix, results, limit)
+
+        return results
+
+
+class AutocompleteCache:
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, partial_name):
+        prefix = normalize_name(partial_name)
+        now = time.monotonic()
+
+        # An exact hit is used as is; a shorter cached prefix only helps if
+        # Scryfall returned every match for it, since the longer prefix's
+        # matches are then a subset of those
+        for end in range(len(prefix), 0, -1):
+            entry = self.entries.get(prefix[:end])
+            if entry is None:
+                continue
+
+            names, complete, fetched_at = entry
+            if now - fetched_at >= self.ttl:
+                del self.entries[prefix[:end]]
+                continue
+
+            if end == len(prefix):
+                self.entries.move_to_end(prefix)
+                return names
+            if complete:
+                return [name for name in names if prefix in normalize_name(name)]
+
+        return None
+
+    def put(self, partial_name, names, complete):
+        prefix = normalize_name(partial_name)
+
+        self.entries.pop(prefix, None)
+        self.entries[prefix] = (names, complete, time.monotonic())
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -3,27 +3,40 @@ import nextcord
 from nextcord.ext import commands
 from dotenv import load_dotenv
 
+# Every module reads its settings when it is first imported, so .env has to
+# be loaded before any of them are
+load_dotenv()
+
 from events import Events
 from activity import Activity
-from commands import Artwork, Cards, Rulings, Settings
+from warmer import Warmer
+from commands import Artwork, Cards, Rulings, Settings, Stats
+from client import http_client
 
 
-load_dotenv()
 TOKEN = os.getenv("TOKEN")
 DEFAULT_WRAPPING = os.getenv("DEFAULT_WRAPPING", default="[[*]]")
 DB_NAME = os.getenv("DB_NAME", default="bot.db")
 REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", default=24))
 
 
+class AmoeboidBot(commands.Bot):
+    async def close(self):
+        await super().close()
+        await http_client.close()
+
+
 intents = nextcord.Intents.default()
 intents.message_content = True
 
-bot = commands.Bot(intents=intents)
+bot = AmoeboidBot(intents=intents)
 bot.add_cog(Cards(bot))
 bot.add_cog(Settings(bot))
 bot.add_cog(Rulings(bot))
 bot.add_cog(Artwork(bot))
+bot.add_cog(Stats(bot))
 bot.add_cog(Events(bot))
 bot.add_cog(Activity(bot))
+bot.add_cog(Warmer(bot))
 
 bot.run(TOKEN)
@@ -0,0 +1,40 @@
+import json
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+# Kept apart from ingest.py, which opens the bot's database when imported, so
+# the parser can be used without touching it
+def iter_bulk_file(path):
+    # Bulk files are one huge JSON array, so objects are decoded one at a time
+    # out of a rolling buffer instead of loading the whole file
+    decoder = json.JSONDecoder()
+    buffer = ""
+
+    with open(path, encoding="utf-8") as bulk_file:
+        while True:
+            chunk = bulk_file.read(CHUNK_SIZE)
+            buffer += chunk
+            pos = 0
+
+            while True:
+                while pos < len(buffer) and buffer[pos] in "[,] \t\r\n":
+                    pos += 1
+
+                if pos == len(buffer):
+                    break
+
+                try:
+                    obj, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break
+
+                yield obj
+
+            buffer = buffer[pos:]
+
+            if not chunk:
+                return
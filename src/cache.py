@@ -0,0 +1,117 @@
+import datetime
+from collections import OrderedDict
+
+import statements
+
+
+class LRUCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size):
+        self.invalidate(key)
+
+        if size > self.max_bytes:
+            return
+
+        self.entries[key] = (value, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, key):
+        entry = self.entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class NegativeCache:
+    def __init__(self, storage, ttl, max_entries):
+        self.storage = storage
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+        self.hits = 0
+
+        self.storage.submit(
+            statements.DELETE_EXPIRED_MISSES, [datetime.datetime.now() - ttl]
+        ).result()
+
+        for query, set_code, missed_at in self.storage.query(statements.SELECT_MISSES):
+            self._remember((query, set_code or None), missed_at)
+
+    def _remember(self, key, missed_at):
+        self.entries.pop(key, None)
+        self.entries[key] = missed_at
+
+        evicted = False
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            evicted = True
+
+        return evicted
+
+    def contains(self, key):
+        missed_at = self.entries.get(key)
+
+        if missed_at is None:
+            return False
+
+        if datetime.datetime.now() - missed_at >= self.ttl:
+            del self.entries[key]
+            return False
+
+        self.hits += 1
+        return True
+
+    def add(self, key):
+        missed_at = datetime.datetime.now()
+        evicted = self._remember(key, missed_at)
+
+        # Name-only misses are stored with an empty set code, since NULLs
+        # would never collide on the UNIQUE constraint
+        self.storage.submit(
+            statements.INSERT_MISS,
+            [key[0], key[1] or "", missed_at],
+        )
+
+        if evicted:
+            # Keep the table to the same size as the in-memory tier
+            self.storage.submit(statements.TRIM_MISSES, [self.max_entries - 1])
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits}
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+import aiohttp
+
+from ratelimit import rate_limiter
+
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", default=10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", default=5))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", default=10))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", default=60))
+
+
+class Response:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HTTPClient:
+    def __init__(self):
+        self.headers = {
+            "User-Agent": "AmoeboidBot",
+            "Accept": "application/json;q=0.9,*/*;q=0.8",
+        }
+        self.timeout = aiohttp.ClientTimeout(
+            total=HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT
+        )
+        self.session = None
+
+    def _get_session(self):
+        # The session has to be created from inside the running event loop,
+        # so it is built on first use rather than at import time
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE, keepalive_timeout=HTTP_KEEPALIVE
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout, headers=self.headers
+            )
+        return self.session
+
+    async def request(self, method, url, params=None, json_body=None):
+        session = self._get_session()
+
+        if params is not None:
+            # requests silently dropped None values, aiohttp refuses them
+            params = {key: value for key, value in params.items() if value is not None}
+
+        await rate_limiter.acquire(url)
+
+        # Timeouts and connection errors come back as a failed response, so
+        # every caller handles them the same way as an error status
+        try:
+            async with session.request(
+                method, url, params=params, json=json_body
+            ) as response:
+                content = await response.read()
+                return Response(response.status, content)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            print(f"Request to {url} failed: {e!r}")
+            return Response(None, b"")
+
+    async def get(self, url, params=None):
+        return await self.request("GET", url, params=params)
+
+    async def post(self, url, json_body=None):
+        return await self.request("POST", url, json_body=json_body)
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+http_client = HTTPClient()
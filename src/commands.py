@@ -1,12 +1,11 @@
 import re
-from time import sleep
 from typing import Optional
 import nextcord
 from nextcord.ext import commands
 
 from settings import bot_settings
 from api import scryfall_api
-from formatting import generate_embed, process_raw_cards
+from formatting import embed_cache, render_embed
 from images import bytes_to_discfile
 
 
@@ -26,27 +25,19 @@ class Cards(commands.Cog):
     ):
         await interaction.response.defer()
 
-        raw_cards = scryfall_api.get_cards(
-            [
-                {
-                    "card_name": name,
-                    "params": [
-                        {
-                            "set": set,
-                        }
-                    ],
-                }
-            ]
-        )
-
-        cards = process_raw_cards(raw_cards)
+        query = {"card_name": name}
+        if set:
+            query["params"] = [{"set": set}]
+
+        cards = await scryfall_api.get_cards([query])
 
         if len(cards) == 1:
             card = cards[0]
+            image = await scryfall_api.get_image(card)
 
-            embed = generate_embed(card)
+            embed = render_embed(card.raw_card, image, card.last_refreshed)
 
-            img = bytes_to_discfile(card.normal_image_bytes, "card.jpg")
+            img = bytes_to_discfile(image, "card.jpg")
             embed.set_image(url="attachment://card.jpg")
 
             await interaction.send(embed=embed, file=img)
@@ -57,9 +48,9 @@ class Cards(commands.Cog):
     @_get_card.on_autocomplete("name")
     async def _card_name_autocomplete(self, interaction, name):
         if name and len(name) > 2:
-            autocomplete = scryfall_api.get_autocomplete(name)
+            autocomplete = await scryfall_api.get_autocomplete(name, "card")
 
-            await interaction.response.send_autocomplete(autocomplete.get("data"))
+            await interaction.response.send_autocomplete(autocomplete)
             return
         else:
             await interaction.response.send_autocomplete([])
@@ -105,6 +96,32 @@ class Settings(commands.Cog):
                 )
 
 
+class Stats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @nextcord.slash_command(
+        name="stats",
+        description="Show the bot's cache and rate limiting statistics",
+        dm_permission=False,
+        default_member_permissions=nextcord.Permissions(administrator=True),
+    )
+    async def _get_stats(self, interaction: nextcord.Interaction):
+        await interaction.response.defer()
+
+        embed = nextcord.Embed(type="rich")
+        embed.title = "Bot statistics"
+
+        sections = scryfall_api.stats()
+        sections["Embed cache"] = embed_cache.stats()
+
+        for section, values in sections.items():
+            value = "\n".join(f"{key}: {values[key]}" for key in values)
+            embed.add_field(name=f"{section}:", value=value or "N/A")
+
+        await interaction.send(embed=embed, ephemeral=True)
+
+
 class Rulings(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -116,13 +133,12 @@ class Rulings(commands.Cog):
     async def _get_rulings(self, interaction: nextcord.Interaction, name: str):
         await interaction.response.defer()
 
-        card = scryfall_api.get_cards([{"card_name": name}])
-        sleep(0.25)  # TODO: better ratelimiting
+        raw_card = await scryfall_api.get_raw_card({"card_name": name})
 
-        if len(card) > 0 and card[0][0].get("rulings_uri"):
-            name = card[0][0]["name"]
-            scryfall_uri = card[0][0].get("scryfall_uri")
-            rulings = scryfall_api.get_rulings(card[0][0]["rulings_uri"])
+        if raw_card is not None and raw_card.get("rulings_uri"):
+            name = raw_card["name"]
+            scryfall_uri = raw_card.get("scryfall_uri")
+            rulings = await scryfall_api.get_rulings(raw_card)
 
             if len(rulings) == 0:
                 await interaction.send(f"Could not find rulings for `{name}`.")
@@ -150,7 +166,7 @@ class Rulings(commands.Cog):
             if len(description) > 2048:
                 embed.description = (
                     embed.description[:1900]
-                    + f"...\n\n[View Full Rulings on Scryfall]({card[0][0]['scryfall_uri']})"
+                    + f"...\n\n[View Full Rulings on Scryfall]({scryfall_uri})"
                 )
 
             await interaction.send(embed=embed)
@@ -161,9 +177,9 @@ class Rulings(commands.Cog):
     @_get_rulings.on_autocomplete("name")
     async def _card_name_autocomplete(self, interaction, name):
         if name and len(name) > 2:
-            autocomplete = scryfall_api.get_autocomplete(name)
+            autocomplete = await scryfall_api.get_autocomplete(name, "rulings")
 
-            await interaction.response.send_autocomplete(autocomplete.get("data"))
+            await interaction.response.send_autocomplete(autocomplete)
             return
         else:
             await interaction.response.send_autocomplete([])
@@ -185,27 +201,21 @@ class Artwork(commands.Cog):
     ):
         await interaction.response.defer()
 
-        card = scryfall_api.get_cards(
-            [
-                {
-                    "card_name": name,
-                    "params": [
-                        {
-                            "set": set,
-                        }
-                    ],
-                }
-            ]
-        )
-
-        if len(card) > 0:
-            name = card[0][0]["name"]
-
-            if card[0][0].get("image_uris").get("art_crop"):
-                art_uri = card[0][0]["image_uris"]["art_crop"]
-                artist_name = card[0][0]["artist"]
-                flavor_text = card[0][0].get("flavor_text")
-                scryfall_uri = card[0][0].get("scryfall_uri")
+        query = {"card_name": name}
+        if set:
+            query["params"] = [{"set": set}]
+
+        cards = await scryfall_api.get_cards([query])
+
+        if len(cards) > 0:
+            raw_card = cards[0].raw_card
+            name = raw_card["name"]
+
+            if raw_card.get("image_uris").get("art_crop"):
+                art_uri = raw_card["image_uris"]["art_crop"]
+                artist_name = raw_card["artist"]
+                flavor_text = raw_card.get("flavor_text")
+                scryfall_uri = raw_card.get("scryfall_uri")
 
                 embed = nextcord.Embed(type="rich")
                 embed.title = name + f" ({set.upper()})" if set else name
@@ -230,9 +240,9 @@ class Artwork(commands.Cog):
     @_get_art.on_autocomplete("name")
     async def _card_name_autocomplete(self, interaction, name):
         if name and len(name) > 2:
-            autocomplete = scryfall_api.get_autocomplete(name)
+            autocomplete = await scryfall_api.get_autocomplete(name, "art")
 
-            await interaction.response.send_autocomplete(autocomplete.get("data"))
+            await interaction.response.send_autocomplete(autocomplete)
             return
         else:
             await interaction.response.send_autocomplete([])
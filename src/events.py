@@ -1,24 +1,17 @@
-from io import BytesIO
 import os
-import re
 from nextcord.ext import commands
-from PIL import Image
 
 from api import scryfall_api
 from settings import bot_settings
 from formatting import (
     format_color_identity,
     format_custom_emojis,
-    generate_embed,
-    process_raw_cards,
-)
-from images import (
-    bytes_to_discfile,
-    img_to_bytearray,
-    stitch_images_horz,
-    stitch_images_vert,
+    render_embed,
 )
+from imagepool import image_pool
+from images import bytes_to_discfile, grid_filename, render_grid
 from models import MagicCard
+from parsing import QueryMatcher, parse_queries
 
 DEFAULT_WRAPPING = os.getenv("DEFAULT_WRAPPING", default="[[*]]")
 
@@ -27,6 +20,19 @@ class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+        # Compiled matchers per guild (None for DMs), rebuilt whenever the
+        # guild's wrapping no longer matches the one it was compiled from
+        self.matchers = {}
+
+    def _get_matcher(self, guild_id, wrapping):
+        matcher = self.matchers.get(guild_id)
+
+        if matcher is None or matcher.wrapping != wrapping:
+            matcher = QueryMatcher(wrapping)
+            self.matchers[guild_id] = matcher
+
+        return matcher
+
     @commands.Cog.listener()
     async def on_ready(self):
         print("Bot is online")
@@ -36,98 +42,66 @@ class Events(commands.Cog):
         if message.author == self.bot.user or message.author.bot:
             return
 
-        wrapping = None
-
         if not message.guild:
-            wrapping = DEFAULT_WRAPPING
-
+            matcher = self._get_matcher(None, DEFAULT_WRAPPING)
         else:
-            wrapping = bot_settings.get_wrapping(message.guild.id)
+            matcher = self._get_matcher(
+                message.guild.id, bot_settings.get_wrapping(message.guild.id)
+            )
 
-        left_split, right_split = wrapping.split("*")
+        raw_queries = matcher.findall(message.content)
 
-        if left_split and right_split not in message.content:
+        if not raw_queries:
             return
 
-        regex = rf"{re.escape(left_split)}(.*?){re.escape(right_split)}"
-        raw_queries = re.findall(regex, message.content)
-
         if len(raw_queries) > 10:
             await message.channel.send("Please request 10 or less cards at a time.")
             return
 
-        queries = []
-
-        for query in raw_queries:
-            query = query.split(";")
-
-            if len(query) == 1:
-                query = {"card_name": query[0]}
-                queries.append(query)
-            else:
-                params = query[1:]
-                query = {
-                    "card_name": query[0],
-                    "params": [],
-                }
-
-                try:
-                    for param in params:
-                        param = param.split("=")
-                        query["params"].append(
-                            {param[0].strip(" "): param[1].strip(" ")}
-                        )
-                    queries.append(query)
-                except:
-                    await message.channel.send("Invalid formatting of parameters.")
-                    return
-
-        raw_cards = scryfall_api.get_cards(queries)
-        cards = process_raw_cards(raw_cards)
+        try:
+            queries = parse_queries(raw_queries)
+        except IndexError:
+            await message.channel.send("Invalid formatting of parameters.")
+            return
+
+        cards = await scryfall_api.get_cards(queries)
 
         if len(cards) == 0:
             await message.channel.send("Could not find any cards.")
 
         elif len(cards) == 1:
             card = cards[0]
+            image = await scryfall_api.get_image(card)
 
-            embed = generate_embed(card)
+            embed = render_embed(card.raw_card, image, card.last_refreshed)
 
-            img = bytes_to_discfile(card.normal_image_bytes, "card.jpg")
+            img = bytes_to_discfile(image, "card.jpg")
             embed.set_image(url="attachment://card.jpg")
 
             await message.channel.send(embed=embed, file=img)
 
         else:
-            images = []
-
-            for card in cards:
-                stream = BytesIO(card.normal_image_bytes)
-                image = Image.open(stream)
-                images.append(image)
-
-            # Note/cmdr0 - Should be able to use stitch_images with some business
-            #   logic here; current math does not account for dual-faced cards
-            # Note/koalasthegreat - Refactored to use the stitch_images functions,
-            #   accounting for the width of dual card images still not implemented
-
-            parsed_image = None
-
-            if len(images) <= 5:
-                parsed_image = stitch_images_horz(images, buf_horz=10, buf_vert=10)
-
-            else:
-                top = stitch_images_horz(images[:5], buf_horz=10, buf_vert=5)
-                bottom = stitch_images_horz(images[5:], buf_horz=10, buf_vert=5)
+            # Tiles share one height and keep their own width, so a
+            # double-faced card gets a double-width slot in its row
+            grid_bytes = await image_pool.run(
+                render_grid, [card.thumbnail for card in cards], optional=True
+            )
 
-                parsed_image = stitch_images_vert([top, bottom])
+            if grid_bytes is None:
+                # Too many grids are already being drawn, so just list the
+                # cards rather than making this message wait its turn
+                names = ", ".join(card.raw_card["name"] for card in cards)
+                await message.channel.send(
+                    f"Retrieved {len(cards)} cards: {names}. "
+                    "Call a single card for more details."
+                )
+                return
 
-            parsed_image_bytes = img_to_bytearray(parsed_image)
-            parsed_image_file = bytes_to_discfile(parsed_image_bytes, "cards.jpg")
+            grid_file = bytes_to_discfile(grid_bytes, grid_filename())
 
             await message.channel.send(
                 f"Retrieved {len(cards)} cards. Call a single card for more details.",
-                file=parsed_image_file,
+                file=grid_file,
             )
 
     @commands.Cog.listener()
@@ -1,66 +1,76 @@
+import copy
+import json
+import os
 import re
 import nextcord
 
+from cache import LRUCache
 from models import MagicCard
 
 
-def format_custom_emojis(text):
-    c_map = {
-        # Basic Symbols
-        "{W}": "manaw:1018637347941797998",
-        "{U}": "manau:1018637747352772698",
-        "{B}": "manab:1018638324627410974",
-        "{R}": "manar:1018637919768023120",
-        "{G}": "manag:1018637911563968592",
-        "{C}": "manac:1018637909013827604",
-        # Numbers
-        "{0}": "mana0:1018638717465935882",
-        "{1}": "mana1:1018638718141214841",
-        "{2}": "mana2:1018638719676338226",
-        "{3}": "mana3:1018638315316072518",
-        "{4}": "mana4:1018638316410777720",
-        "{5}": "mana5:1018638317736181921",
-        "{6}": "mana6:1018638318772174898",
-        "{7}": "mana7:1018638319883653231",
-        "{8}": "mana8:1018638320969982044",
-        "{9}": "mana9:1018638321993383958",
-        "{10}": "mana10:1018638323507544234",
-        # Phyrexian Mana
-        "{W/P}": "manawp:1018637344024313938",
-        "{U/P}": "manaup:1018637352823955559",
-        "{B/P}": "manabp:1018638328066752666",
-        "{R/P}": "manarp:1018637741602377758",
-        "{G/P}": "managp:1018637912084062350",
-        # Hybrid Generic/Colored
-        "{2/W}": "mana2w:1018664005713285131",
-        "{2/U}": "mana2u:1018664004383674420",
-        "{2/B}": "mana2b:1018638720771035158",
-        "{2/R}": "mana2r:1018638723467980942",
-        "{2/G}": "mana2g:1018638722125803591",
-        # Allied Colors
-        "{W/U}": "manawu:1018637342707302571",
-        "{U/B}": "manaub:1018637748468461578",
-        "{B/R}": "manabr:1018637906887315536",
-        "{R/G}": "manarg:1018637738662182933",
-        "{G/W}": "managw:1018637915586306058",
-        # Enemy Colors
-        "{W/B}": "manawb:1018637346796752926",
-        "{B/G}": "manabg:1018638325575323709",
-        "{G/U}": "managu:1018637913321377822",
-        "{U/R}": "manaur:1018637350953295944",
-        "{R/W}": "manarw:1018637742797750292",
-        # Other Symbols/Mana
-        "{S}": "manas:1018637745058488364",
-        "{X}": "manax:1018637749173100717",
-        "{E}": "manae:1018637910041440317",
-        "{T}": "manat:1018637745951887453",
-        "{Q}": "manaq:1018637918300024965",
-    }
+EMBED_CACHE_MB = float(os.getenv("EMBED_CACHE_MB", default=8))
+
+MANA_SYMBOLS = {
+    # Basic Symbols
+    "{W}": "manaw:1018637347941797998",
+    "{U}": "manau:1018637747352772698",
+    "{B}": "manab:1018638324627410974",
+    "{R}": "manar:1018637919768023120",
+    "{G}": "manag:1018637911563968592",
+    "{C}": "manac:1018637909013827604",
+    # Numbers
+    "{0}": "mana0:1018638717465935882",
+    "{1}": "mana1:1018638718141214841",
+    "{2}": "mana2:1018638719676338226",
+    "{3}": "mana3:1018638315316072518",
+    "{4}": "mana4:1018638316410777720",
+    "{5}": "mana5:1018638317736181921",
+    "{6}": "mana6:1018638318772174898",
+    "{7}": "mana7:1018638319883653231",
+    "{8}": "mana8:1018638320969982044",
+    "{9}": "mana9:1018638321993383958",
+    "{10}": "mana10:1018638323507544234",
+    # Phyrexian Mana
+    "{W/P}": "manawp:1018637344024313938",
+    "{U/P}": "manaup:1018637352823955559",
+    "{B/P}": "manabp:1018638328066752666",
+    "{R/P}": "manarp:1018637741602377758",
+    "{G/P}": "managp:1018637912084062350",
+    # Hybrid Generic/Colored
+    "{2/W}": "mana2w:1018664005713285131",
+    "{2/U}": "mana2u:1018664004383674420",
+    "{2/B}": "mana2b:1018638720771035158",
+    "{2/R}": "mana2r:1018638723467980942",
+    "{2/G}": "mana2g:1018638722125803591",
+    # Allied Colors
+    "{W/U}": "manawu:1018637342707302571",
+    "{U/B}": "manaub:1018637748468461578",
+    "{B/R}": "manabr:1018637906887315536",
+    "{R/G}": "manarg:1018637738662182933",
+    "{G/W}": "managw:1018637915586306058",
+    # Enemy Colors
+    "{W/B}": "manawb:1018637346796752926",
+    "{B/G}": "manabg:1018638325575323709",
+    "{G/U}": "managu:1018637913321377822",
+    "{U/R}": "manaur:1018637350953295944",
+    "{R/W}": "manarw:1018637742797750292",
+    # Other Symbols/Mana
+    "{S}": "manas:1018637745058488364",
+    "{X}": "manax:1018637749173100717",
+    "{E}": "manae:1018637910041440317",
+    "{T}": "manat:1018637745951887453",
+    "{Q}": "manaq:1018637918300024965",
+}
+
+MANA_SYMBOL_PATTERN = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(key) for key in MANA_SYMBOLS.keys()) + r")(?!\w)"
+)
+
+embed_cache = LRUCache(int(EMBED_CACHE_MB * 1024 * 1024))
 
-    pattern = re.compile(
-        r"(?<!\w)(" + "|".join(re.escape(key) for key in c_map.keys()) + r")(?!\w)"
-    )
-    return pattern.sub(lambda x: f"<:{c_map[x.group()]}>", text)
+
+def format_custom_emojis(text):
+    return MANA_SYMBOL_PATTERN.sub(lambda x: f"<:{MANA_SYMBOLS[x.group()]}>", text)
 
 
 def format_color_identity(color):
@@ -187,11 +197,27 @@ def generate_embed(card):
     return embed
 
 
+def render_embed(raw_card, image, last_refreshed):
+    # A card only renders differently once it has been refreshed, so the
+    # finished embed is reused until then
+    key = (raw_card["id"], last_refreshed)
+    data = embed_cache.get(key)
+
+    if data is None:
+        card = process_raw_cards([(raw_card, image, last_refreshed)])[0]
+        data = generate_embed(card).to_dict()
+        embed_cache.put(key, data, len(json.dumps(data)))
+
+    # from_dict keeps the nested lists it is given, so each caller gets its
+    # own copy to add fields to
+    return nextcord.Embed.from_dict(copy.deepcopy(data))
+
+
 def process_raw_cards(raw_cards):
     cards = []
 
-    for raw_card, image in raw_cards:
-        splat = raw_card
+    for raw_card, image, _ in raw_cards:
+        splat = dict(raw_card)
 
         if raw_card["layout"] == "split":
             left = raw_card["card_faces"][0]
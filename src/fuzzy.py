@@ -0,0 +1,193 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+import re
+import unicodedata
+
+
+TRIGRAM_CANDIDATES = 20
+PREFIX_CANDIDATES = 500
+
+
+def normalize_name(name):
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = name.lower().replace("'", "").replace("’", "")
+    name = re.sub(r"[^a-z0-9]+", " ", name)
+
+    return name.strip()
+
+
+def trigrams(key):
+    padded = f" {key} "
+    return {padded[idx : idx + 3] for idx in range(len(padded) - 2)}
+
+
+def edit_distance(left, right, limit):
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+
+    previous = list(range(len(right) + 1))
+
+    for row, left_char in enumerate(left, 1):
+        current = [row]
+        for col, right_char in enumerate(right, 1):
+            current.append(
+                min(
+                    previous[col] + 1,
+                    current[col - 1] + 1,
+                    previous[col - 1] + (left_char != right_char),
+                )
+            )
+
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return previous[-1]
+
+
+def matches_tokens(query_tokens, name_tokens):
+    # Every query token has to match, in order, either the start of a name
+    # token ("bolt", "urza saga") or the initials of a run of name tokens
+    # ("jace tms")
+    pos = 0
+
+    for token in query_tokens:
+        while pos < len(name_tokens):
+            if name_tokens[pos].startswith(token):
+                pos += 1
+                break
+
+            run = name_tokens[pos : pos + len(token)]
+            if len(token) > 1 and "".join(word[0] for word in run) == token:
+                pos += len(token)
+                break
+
+            pos += 1
+        else:
+            return False
+
+    return True
+
+
+class NameIndex:
+    def __init__(self):
+        self.names = {}
+        self.keys = []
+        self.key_tokens = []
+        self.trigrams = defaultdict(set)
+        self.tokens = defaultdict(set)
+        self.sorted_tokens = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        # Double-faced and split cards can be found by either face as well
+        faces = name.split(" // ") if " // " in name else []
+        added = False
+
+        for key in [normalize_name(name)] + [normalize_name(face) for face in faces]:
+            if not key or key in self.names:
+                continue
+
+            idx = len(self.keys)
+            self.names[key] = name
+            self.keys.append(key)
+            self.key_tokens.append(key.split(" "))
+
+            for gram in trigrams(key):
+                self.trigrams[gram].add(idx)
+            for token in self.key_tokens[idx]:
+                self.tokens[token].add(idx)
+
+            added = True
+
+        if added:
+            self.sorted_tokens = None
+
+    def lookup(self, query, fuzzy=True):
+        key = normalize_name(query)
+        if not key:
+            return None
+
+        if key in self.names:
+            return self.names[key]
+
+        # A partial name or typo can only be trusted to mean the closest
+        # indexed name if every card name is indexed
+        if not fuzzy:
+            return None
+
+        return self._lookup_prefix(key) or self._lookup_typo(key)
+
+    def _tokens_starting_with(self, prefix):
+        if self.sorted_tokens is None:
+            self.sorted_tokens = sorted(self.tokens)
+
+        idx = bisect_left(self.sorted_tokens, prefix)
+        while idx < len(self.sorted_tokens):
+            if not self.sorted_tokens[idx].startswith(prefix):
+                break
+            yield self.sorted_tokens[idx]
+            idx += 1
+
+    def _lookup_prefix(self, key):
+        query_tokens = key.split(" ")
+        candidates = None
+
+        # Narrow down with the query tokens that are prefixes of known tokens;
+        # the rest may still be initials, which matches_tokens checks below
+        for token in query_tokens:
+            if len(token) < 2:
+                continue
+
+            matching = set()
+            for known_token in self._tokens_starting_with(token):
+                matching |= self.tokens[known_token]
+
+            if matching:
+                candidates = matching if candidates is None else candidates & matching
+
+        if not candidates or len(candidates) > PREFIX_CANDIDATES:
+            return None
+
+        matches = [
+            idx
+            for idx in candidates
+            if matches_tokens(query_tokens, self.key_tokens[idx])
+        ]
+        if not matches:
+            return None
+
+        # Whole-word hits beat partial ones, then the shortest name wins, so
+        # "bolt" finds Lightning Bolt before Boltwing Marauder
+        best = min(
+            matches,
+            key=lambda idx: (
+                -len(set(query_tokens) & set(self.key_tokens[idx])),
+                len(self.key_tokens[idx]),
+                len(self.keys[idx]),
+            ),
+        )
+        return self.names[self.keys[best]]
+
+    def _lookup_typo(self, key):
+        shared = Counter()
+        for gram in trigrams(key):
+            shared.update(self.trigrams.get(gram, ()))
+
+        limit = max(1, len(key) // 4)
+        best = None
+        best_distance = limit + 1
+
+        for idx, _ in shared.most_common(TRIGRAM_CANDIDATES):
+            distance = edit_distance(key, self.keys[idx], limit)
+            if distance < best_distance:
+                best = idx
+                best_distance = distance
+
+        if best is None:
+            return None
+
+        return self.names[self.keys[best]]
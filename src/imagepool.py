@@ -0,0 +1,40 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", default=2))
+IMAGE_QUEUE_LIMIT = int(os.getenv("IMAGE_QUEUE_LIMIT", default=8))
+
+
+class ImagePool:
+    def __init__(self, workers, queue_limit):
+        # Threads rather than processes: Pillow releases the GIL while it
+        # decodes, resizes, pastes and encodes, and nothing has to be pickled
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="images"
+        )
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+
+    async def run(self, func, *args, optional=False):
+        # Optional work (like a grid that has a text fallback) is turned
+        # away once the pool is backed up, instead of queueing behind it
+        if optional and self.pending >= self.queue_limit:
+            self.rejected += 1
+            return None
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {"pending": self.pending, "rejected": self.rejected}
+
+
+image_pool = ImagePool(IMAGE_WORKERS, IMAGE_QUEUE_LIMIT)
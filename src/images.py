@@ -1,45 +1,133 @@
 from io import BytesIO
+import os
 from PIL import Image
 import nextcord
 
 
+GRID_COLUMNS = int(os.getenv("GRID_COLUMNS", default=5))
+GRID_CARD_WIDTH = int(os.getenv("GRID_CARD_WIDTH", default=244))
+GRID_FORMAT = os.getenv("GRID_FORMAT", default="JPEG").upper()
+GRID_QUALITY = int(os.getenv("GRID_QUALITY", default=85))
+GRID_MAX_KB = int(os.getenv("GRID_MAX_KB", default=1024))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", default=90))
+
+GRID_SPACING = 10
+GRID_MIN_QUALITY = 50
+COMPOSITE_QUALITY = 90
+GRID_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+# Scryfall's "normal" card images are 488x680
+CARD_ASPECT = 680 / 488
+
+
 def bytes_to_discfile(byte_arr, filename):
     iobytes = BytesIO(byte_arr)
     iobytes.seek(0)
     return nextcord.File(iobytes, filename=filename)
 
 
-def img_to_bytearray(img):
-    byte_arr = BytesIO()
-    img.save(byte_arr, format="PNG")
-    return byte_arr.getvalue()
-
-
 def stitch_images_horz(images, buf_horz=0, buf_vert=0, bgcolor=(255, 255, 255)):
     new_img_size = (
         sum([img.width for img in images]) + buf_horz * (len(images) + 1),
         max([img.height for img in images]) + buf_vert * 2,
     )
     new_img = Image.new("RGB", new_img_size, color=bgcolor)
-    for idx, paste_img in enumerate(images):
-        paste_img_loc = (
-            sum([img.width for img in images[:idx]]) + buf_horz * (idx + 1),
-            buf_vert,
-        )
-        new_img.paste(paste_img, paste_img_loc)
+    x = buf_horz
+    for paste_img in images:
+        new_img.paste(paste_img, (x, buf_vert))
+        x += paste_img.width + buf_horz
     return new_img
 
 
-def stitch_images_vert(images, buf_horz=0, buf_vert=0, bgcolor=(255, 255, 255)):
-    new_img_size = (
-        max([img.width for img in images]) + buf_horz * 2,
-        sum([img.height for img in images]) + buf_vert * (len(images) + 1),
+def stitch_faces(faces):
+    images = [Image.open(BytesIO(face)) for face in faces]
+
+    byte_arr = BytesIO()
+    stitch_images_horz(images, buf_horz=10).save(
+        byte_arr, format="JPEG", quality=COMPOSITE_QUALITY
     )
-    new_img = Image.new("RGB", new_img_size, color=bgcolor)
-    for idx, paste_img in enumerate(images):
-        paste_img_loc = (
-            buf_horz,
-            sum([img.height for img in images[:idx]]) + buf_vert * (idx + 1),
-        )
-        new_img.paste(paste_img, paste_img_loc)
-    return new_img
+    return byte_arr.getvalue()
+
+
+def make_thumbnail(images, card_width=GRID_CARD_WIDTH):
+    tile_height = round(card_width * CARD_ASPECT)
+    tiles = [load_tile(image_bytes, tile_height) for image_bytes in images]
+
+    # Faces are laid out the same way as a full size composite, so a
+    # thumbnail looks the same whichever it was made from
+    if len(tiles) == 1:
+        thumbnail = tiles[0]
+    else:
+        thumbnail = stitch_images_horz(tiles, buf_horz=GRID_SPACING // 2)
+
+    byte_arr = BytesIO()
+    thumbnail.save(byte_arr, format="JPEG", quality=THUMBNAIL_QUALITY)
+    return byte_arr.getvalue()
+
+
+def grid_filename():
+    return f"cards.{GRID_EXTENSIONS.get(GRID_FORMAT, 'jpg')}"
+
+
+def load_tile(image_bytes, tile_height):
+    tile = Image.open(BytesIO(image_bytes))
+
+    # JPEG tiles are decoded straight at a reduced scale where possible,
+    # which is much cheaper than decoding full size and shrinking after
+    tile.draft("RGB", (tile.width * tile_height // tile.height, tile_height))
+
+    # Every tile gets the same height, so double-faced tiles keep their
+    # double width instead of being squeezed into a single card's slot
+    width = max(1, round(tile.width * tile_height / tile.height))
+    tile = tile.convert("RGB")
+
+    if tile.size == (width, tile_height):
+        return tile
+    return tile.resize((width, tile_height), Image.Resampling.LANCZOS)
+
+
+def render_grid(
+    images,
+    columns=GRID_COLUMNS,
+    card_width=GRID_CARD_WIDTH,
+    bgcolor=(255, 255, 255),
+):
+    tile_height = round(card_width * CARD_ASPECT)
+    tiles = [load_tile(image_bytes, tile_height) for image_bytes in images]
+
+    # Work out every tile's position in one pass before touching any pixels
+    positions = []
+    width = 0
+    y = GRID_SPACING
+    for row_start in range(0, len(tiles), columns):
+        x = GRID_SPACING
+        for tile in tiles[row_start : row_start + columns]:
+            positions.append((x, y))
+            x += tile.width + GRID_SPACING
+        width = max(width, x)
+        y += tile_height + GRID_SPACING
+
+    grid = Image.new("RGB", (width, y), color=bgcolor)
+    for tile, position in zip(tiles, positions):
+        grid.paste(tile, position)
+
+    return encode_image(grid)
+
+
+def encode_image(
+    img, format=GRID_FORMAT, quality=GRID_QUALITY, max_bytes=GRID_MAX_KB * 1024
+):
+    # Lower the quality first, then the resolution, until the image fits
+    while True:
+        byte_arr = BytesIO()
+        img.save(byte_arr, format=format, quality=quality)
+
+        if byte_arr.tell() <= max_bytes or min(img.size) <= 64:
+            return byte_arr.getvalue()
+
+        if quality > GRID_MIN_QUALITY:
+            quality = max(GRID_MIN_QUALITY, quality - 10)
+        else:
+            img = img.resize(
+                (img.width * 3 // 4, img.height * 3 // 4), Image.Resampling.LANCZOS
+            )
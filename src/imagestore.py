@@ -0,0 +1,48 @@
+import hashlib
+import os
+import tempfile
+
+
+IMAGE_DIR = os.getenv("IMAGE_DIR", default="images")
+
+
+class ImageStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, digest):
+        # Two levels of sharding keep directories small even with every
+        # printing of every card stored
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+
+        if os.path.exists(path):
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Written to a temporary file first so a crash never leaves a
+        # truncated image under a valid hash
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+
+        return digest
+
+    def exists(self, digest):
+        return os.path.exists(self.path_for(digest))
+
+    def get(self, digest):
+        try:
+            with open(self.path_for(digest), "rb") as image_file:
+                return image_file.read()
+        except FileNotFoundError:
+            return None
+
+
+image_store = ImageStore(os.path.join("..", IMAGE_DIR))
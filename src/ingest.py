@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+from dotenv import load_dotenv
+
+# Settings are read when api and storage are imported, so .env has to be
+# loaded first for the ingest to use the bot's database and image directory
+load_dotenv()
+
+from api import SKIPPED_LAYOUTS, scryfall_api
+from bulk import iter_bulk_file
+
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", default=1000))
+
+
+async def ingest_bulk_file(path):
+    batch = []
+    rulings = {}
+    total = 0
+
+    for obj in iter_bulk_file(path):
+        # The rulings file is small next to the card files, and rulings have
+        # to be grouped by card before they can be stored
+        if obj.get("object") == "ruling":
+            rulings.setdefault(obj["oracle_id"], []).append(obj)
+            continue
+
+        if obj.get("object") != "card":
+            continue
+        if obj.get("layout") in SKIPPED_LAYOUTS:
+            continue
+
+        batch.append(obj)
+
+        if len(batch) >= INGEST_BATCH_SIZE:
+            total += await scryfall_api.ingest_cards(batch)
+            batch = []
+            print(f"Ingested {total} cards")
+
+    if batch:
+        total += await scryfall_api.ingest_cards(batch)
+
+    if total:
+        await scryfall_api.record_bulk_ingest(total)
+
+    if rulings:
+        oracle_ids = list(rulings)
+        for idx in range(0, len(oracle_ids), INGEST_BATCH_SIZE):
+            await scryfall_api.ingest_rulings(
+                {
+                    oracle_id: rulings[oracle_id]
+                    for oracle_id in oracle_ids[idx : idx + INGEST_BATCH_SIZE]
+                }
+            )
+        print(f"Ingested rulings for {len(oracle_ids)} cards")
+
+    return total
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python ingest.py <path to Scryfall bulk data file>")
+        sys.exit(1)
+
+    total = asyncio.run(ingest_bulk_file(sys.argv[1]))
+    print(f"Done, {total} cards added or updated")
@@ -0,0 +1,160 @@
+import sqlite3
+
+from fuzzy import normalize_name
+from imagestore import image_store
+
+
+def create_tables(conn):
+    # Everything up to the image store, thumbnails and split faces, which
+    # older databases may only have part of
+    cursor = conn.cursor()
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cards
+        (name text UNIQUE, raw_card text, image_hash text, face_hashes text,
+        thumb_hash text, last_refreshed timestamp)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS printings
+        (name text, set_code text, raw_card text, image_hash text,
+        face_hashes text, thumb_hash text, last_refreshed timestamp,
+        UNIQUE (name, set_code))
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS card_hits
+        (name text, set_code text, hits integer, last_hit timestamp,
+        UNIQUE (name, set_code))
+    """
+    )
+    cursor.execute("CREATE TABLE IF NOT EXISTS warmed_sets (set_code text UNIQUE)")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rulings
+        (oracle_id text UNIQUE, raw_rulings text, last_refreshed timestamp)
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS misses
+        (query text, set_code text, missed_at timestamp, UNIQUE (query, set_code))
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings
+        (server_id text UNIQUE, wrapping text)
+    """
+    )
+
+    migrate_image_blobs(conn)
+
+    for table in ["cards", "printings"]:
+        columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+        for column in ["face_hashes", "thumb_hash"]:
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} text")
+
+
+def migrate_image_blobs(conn):
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(cards)")]
+    if "image" not in columns:
+        return
+
+    # Databases from before the image store kept every image as a blob in
+    # the cards table; move them out a batch at a time, then drop the column
+    print("Moving card images out of the database, this only happens once")
+
+    if "image_hash" not in columns:
+        cursor.execute("ALTER TABLE cards ADD COLUMN image_hash text")
+
+    while True:
+        rows = cursor.execute(
+            "SELECT rowid, image FROM cards WHERE image IS NOT NULL LIMIT 100"
+        ).fetchall()
+        if not rows:
+            break
+
+        cursor.executemany(
+            "UPDATE cards SET image_hash = ?, image = NULL WHERE rowid = ?",
+            [(image_store.put(bytes(image)), rowid) for rowid, image in rows],
+        )
+
+    # DROP COLUMN needs SQLite 3.35; older versions keep the column, which
+    # is empty by now and never read
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        cursor.execute("ALTER TABLE cards DROP COLUMN image")
+
+
+def add_card_keys(conn):
+    # Lookups go through the same normalized name NameIndex resolves to, and
+    # bulk ingest compares Scryfall ids; both are pulled out of the stored
+    # JSON into columns
+    cursor = conn.cursor()
+
+    for table in ["cards", "printings"]:
+        for column in ["id", "normalized_name"]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} text")
+
+        cursor.execute(f"UPDATE {table} SET id = json_extract(raw_card, '$.id')")
+        cursor.executemany(
+            f"UPDATE {table} SET normalized_name = ? WHERE rowid = ?",
+            [
+                (normalize_name(name), rowid)
+                for rowid, name in cursor.execute(
+                    f"SELECT rowid, name FROM {table}"
+                ).fetchall()
+            ],
+        )
+
+    cursor.execute("CREATE INDEX cards_normalized_name ON cards (normalized_name)")
+    cursor.execute(
+        "CREATE INDEX printings_normalized_name ON printings (normalized_name, set_code)"
+    )
+
+    # The warmer reads the most requested cards and the negative cache
+    # trims its oldest entries, both of which would otherwise sort the table
+    cursor.execute("CREATE INDEX card_hits_hits ON card_hits (hits)")
+    cursor.execute("CREATE INDEX misses_missed_at ON misses (missed_at)")
+
+
+def add_bulk_ingests(conn):
+    # Only once a whole bulk file has been ingested does the database know
+    # every card name, which is what lets partial names be resolved locally
+    conn.execute("CREATE TABLE bulk_ingests (ingested_at timestamp, cards integer)")
+
+
+# Append only: a database at version N has had the first N of these applied.
+# Each one runs inside migrate's transaction and must not commit on its own
+MIGRATIONS = [create_tables, add_card_keys, add_bulk_ingests]
+
+
+def migrate(conn):
+    conn.commit()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        print(f"Migrating database to version {number}")
+
+        # A migration and its version bump are committed together, so one
+        # that fails partway leaves the database as it was and is tried
+        # again from the start the next time the bot starts
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"Migration to version {number} failed, nothing was changed")
+            raise
+
+    # Moving data out of the database leaves its pages on the free list
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if free_pages > conn.execute("PRAGMA page_count").fetchone()[0] // 4:
+        conn.execute("VACUUM")
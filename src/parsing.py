@@ -0,0 +1,41 @@
+import re
+
+
+class QueryMatcher:
+    def __init__(self, wrapping):
+        self.wrapping = wrapping
+        self.left_split, self.right_split = wrapping.split("*", 1)
+        self.regex = re.compile(
+            rf"{re.escape(self.left_split)}(.*?){re.escape(self.right_split)}"
+        )
+
+    def findall(self, content):
+        # Most messages aren't card calls at all, so a plain substring check
+        # on both delimiters turns them away before any regex work
+        if self.left_split not in content or self.right_split not in content:
+            return []
+
+        return self.regex.findall(content)
+
+
+def parse_queries(raw_queries):
+    queries = []
+
+    for query in raw_queries:
+        query = query.split(";")
+
+        if len(query) == 1:
+            queries.append({"card_name": query[0]})
+        else:
+            params = query[1:]
+            query = {
+                "card_name": query[0],
+                "params": [],
+            }
+
+            for param in params:
+                param = param.split("=")
+                query["params"].append({param[0].strip(" "): param[1].strip(" ")})
+            queries.append(query)
+
+    return queries
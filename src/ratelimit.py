@@ -0,0 +1,65 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlparse
+
+
+SCRYFALL_API_HOST = os.getenv("SCRYFALL_API_HOST", default="api.scryfall.com")
+API_RATE = float(os.getenv("API_RATE", default=10))
+API_BURST = int(os.getenv("API_BURST", default=10))
+IMAGE_RATE = float(os.getenv("IMAGE_RATE", default=20))
+IMAGE_BURST = int(os.getenv("IMAGE_BURST", default=20))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.waiting = 0
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self.waiting += 1
+
+        try:
+            # The lock keeps waiters in FIFO order, so only the head of the
+            # queue sleeps and everyone else waits their turn behind it
+            async with self.lock:
+                self._refill()
+
+                if self.tokens < 1:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+                    self._refill()
+
+                self.tokens -= 1
+        finally:
+            self.waiting -= 1
+
+
+class RateLimiter:
+    def __init__(self):
+        self.buckets = {
+            "api": TokenBucket(API_RATE, API_BURST),
+            "images": TokenBucket(IMAGE_RATE, IMAGE_BURST),
+        }
+
+    def bucket_for(self, url):
+        if urlparse(url).hostname == SCRYFALL_API_HOST:
+            return self.buckets["api"]
+        return self.buckets["images"]
+
+    async def acquire(self, url):
+        await self.bucket_for(url).acquire()
+
+    def queue_depth(self):
+        return {name: bucket.waiting for name, bucket in self.buckets.items()}
+
+
+rate_limiter = RateLimiter()
@@ -1,52 +1,29 @@
 import os
-import sqlite3
 
-DB_NAME = os.getenv("DB_NAME", default="bot.db")
+import statements
+from storage import storage
+
 DEFAULT_WRAPPING = os.getenv("DEFAULT_WRAPPING", default="[[*]]")
 
 
 class BotSettings:
     def __init__(self):
-        self.conn = sqlite3.connect(f"../{DB_NAME}")
-        self.cursor = self.conn.cursor()
-
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS settings
-            (server_id text UNIQUE, wrapping text)    
-        """
-        )
-        self.conn.commit()
+        # Every guild's settings are kept in memory so the per-message path
+        # never touches the database; writes go through to both
+        self.settings = {}
+        for server_id, wrapping in storage.query(statements.SELECT_SETTINGS):
+            self.settings[str(server_id)] = {"wrapping": wrapping}
 
     def set_wrapping(self, server_id, wrapping):
-        self.cursor.execute(
-            """
-            INSERT OR IGNORE INTO settings
-            (server_id, wrapping)
-            VALUES(?, ?)
-        """,
-            (server_id, DEFAULT_WRAPPING),
-        )
-
-        self.cursor.execute(
-            """
-            UPDATE settings
-            SET wrapping=?
-            WHERE server_id=?
-        """,
-            (wrapping, server_id),
-        )
-
-        self.conn.commit()
+        storage.submit(statements.UPSERT_WRAPPING, (server_id, wrapping))
+
+        self.settings.setdefault(str(server_id), {})["wrapping"] = wrapping
 
     def get_wrapping(self, server_id):
-        self.cursor.execute(
-            "SELECT wrapping FROM settings WHERE server_id=?", (server_id,)
-        )
-        result = self.cursor.fetchone()
+        guild_settings = self.settings.get(str(server_id))
 
-        if result is not None:
-            return result[0]
+        if guild_settings is not None and guild_settings.get("wrapping") is not None:
+            return guild_settings["wrapping"]
         else:
             return DEFAULT_WRAPPING
 
@@ -0,0 +1,25 @@
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self.calls = {}
+        self.shared = 0
+
+    async def do(self, key, func):
+        # Concurrent callers with the same key all wait on the first caller's
+        # task; shield() keeps one impatient waiter from cancelling it for
+        # everybody else
+        task = self.calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"in flight": len(self.calls), "shared": self.shared}
@@ -0,0 +1,136 @@
+# Every statement the bot runs against its database, kept in one place so
+# tests/test_query_plans.py checks exactly what api, cache and settings run
+
+SELECT_ALL_NAMES = "SELECT name FROM cards UNION SELECT name FROM printings"
+
+SELECT_BULK_INGEST = "SELECT ingested_at FROM bulk_ingests LIMIT 1"
+
+INSERT_BULK_INGEST = "INSERT INTO bulk_ingests VALUES (?, ?)"
+
+SELECT_CARD = """
+    SELECT raw_card, image_hash, face_hashes, last_refreshed, thumb_hash
+    FROM cards WHERE normalized_name = ?
+"""
+
+SELECT_PRINTING = """
+    SELECT raw_card, image_hash, face_hashes, last_refreshed, thumb_hash
+    FROM printings WHERE normalized_name = ? AND set_code = ?
+"""
+
+UPDATE_CARD_THUMBNAIL = "UPDATE cards SET thumb_hash = ? WHERE name = ?"
+
+UPDATE_PRINTING_THUMBNAIL = (
+    "UPDATE printings SET thumb_hash = ? WHERE name = ? AND set_code = ?"
+)
+
+# Images that can't be decoded are forgotten so they are downloaded again
+CLEAR_CARD_IMAGES = """
+    UPDATE cards SET image_hash = NULL, face_hashes = NULL, thumb_hash = NULL
+    WHERE name = ?
+"""
+
+CLEAR_PRINTING_IMAGES = """
+    UPDATE printings SET image_hash = NULL, face_hashes = NULL, thumb_hash = NULL
+    WHERE name = ? AND set_code = ?
+"""
+
+INSERT_CARD = """
+    INSERT OR REPLACE INTO cards
+    (name, raw_card, image_hash, face_hashes, thumb_hash, last_refreshed,
+    id, normalized_name)
+    VALUES (?,?,?,?,?,?,?,?)
+"""
+
+INSERT_PRINTING = """
+    INSERT OR REPLACE INTO printings
+    (name, set_code, raw_card, image_hash, face_hashes, thumb_hash,
+    last_refreshed, id, normalized_name)
+    VALUES (?,?,?,?,?,?,?,?,?)
+"""
+
+# Re-ingesting updates rows in place, never lets an older printing replace a
+# newer one, and keeps any downloaded image unless Scryfall has since
+# replaced the scan
+UPSERT_BULK_CARD = """
+    INSERT INTO cards
+    (name, raw_card, image_hash, last_refreshed, id, normalized_name)
+    VALUES (?, ?, NULL, ?, ?, ?)
+    ON CONFLICT (name) DO UPDATE SET
+        raw_card = excluded.raw_card,
+        image_hash = CASE
+            WHEN id = excluded.id
+            AND json_extract(raw_card, '$.image_status')
+                IS json_extract(excluded.raw_card, '$.image_status')
+            THEN image_hash
+        END,
+        thumb_hash = CASE
+            WHEN id = excluded.id
+            AND json_extract(raw_card, '$.image_status')
+                IS json_extract(excluded.raw_card, '$.image_status')
+            THEN thumb_hash
+        END,
+        face_hashes = CASE
+            WHEN id = excluded.id
+            AND json_extract(raw_card, '$.image_status')
+                IS json_extract(excluded.raw_card, '$.image_status')
+            THEN face_hashes
+        END,
+        last_refreshed = excluded.last_refreshed,
+        id = excluded.id
+    WHERE id = excluded.id
+    OR json_extract(raw_card, '$.released_at')
+        <= json_extract(excluded.raw_card, '$.released_at')
+"""
+
+UPSERT_CARD_HITS = """
+    INSERT INTO card_hits (name, set_code, hits, last_hit)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (name, set_code) DO UPDATE SET
+        hits = hits + excluded.hits,
+        last_hit = excluded.last_hit
+"""
+
+# Of the most requested cards, the ones refreshed before the cutoff, most
+# popular first
+SELECT_EXPIRING_CARDS = """
+    SELECT card_hits.name, card_hits.set_code FROM card_hits
+    LEFT JOIN cards
+    ON card_hits.set_code = '' AND cards.name = card_hits.name
+    LEFT JOIN printings
+    ON printings.set_code = card_hits.set_code
+    AND printings.name = card_hits.name
+    WHERE card_hits.hits >= COALESCE(
+        (SELECT hits FROM card_hits ORDER BY hits DESC LIMIT 1 OFFSET ?), 0
+    )
+    AND COALESCE(cards.last_refreshed, printings.last_refreshed) < ?
+    ORDER BY card_hits.hits DESC
+"""
+
+SELECT_WARMED_SETS = "SELECT set_code FROM warmed_sets"
+
+INSERT_WARMED_SET = "INSERT OR IGNORE INTO warmed_sets VALUES (?)"
+
+SELECT_RULINGS = "SELECT raw_rulings, last_refreshed FROM rulings WHERE oracle_id = ?"
+
+INSERT_RULINGS = "INSERT OR REPLACE INTO rulings VALUES (?,?,?)"
+
+DELETE_EXPIRED_MISSES = "DELETE FROM misses WHERE missed_at < ?"
+
+SELECT_MISSES = "SELECT query, set_code, missed_at FROM misses ORDER BY missed_at"
+
+INSERT_MISS = "INSERT OR REPLACE INTO misses VALUES (?,?,?)"
+
+# Keeps the newest entries; rows tied with the oldest of them stay as well
+TRIM_MISSES = """
+    DELETE FROM misses WHERE missed_at < (
+        SELECT missed_at FROM misses
+        ORDER BY missed_at DESC LIMIT 1 OFFSET ?
+    )
+"""
+
+SELECT_SETTINGS = "SELECT server_id, wrapping FROM settings"
+
+UPSERT_WRAPPING = """
+    INSERT INTO settings (server_id, wrapping) VALUES (?, ?)
+    ON CONFLICT (server_id) DO UPDATE SET wrapping = excluded.wrapping
+"""
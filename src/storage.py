@@ -0,0 +1,160 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+
+from migrations import migrate
+
+
+DB_NAME = os.getenv("DB_NAME", default="bot.db")
+DB_READERS = int(os.getenv("DB_READERS", default=4))
+DB_CACHE_MB = int(os.getenv("DB_CACHE_MB", default=32))
+DB_MMAP_MB = int(os.getenv("DB_MMAP_MB", default=256))
+
+WRITE_BATCH_SIZE = 500
+
+
+class Storage:
+    def __init__(self, path, readers):
+        self.path = path
+        self.local = threading.local()
+        self.readers = ThreadPoolExecutor(
+            max_workers=readers, thread_name_prefix="db-reader"
+        )
+
+        # WAL lets the readers keep going while the writer commits; it is a
+        # property of the database file, so setting it once here is enough.
+        # Migrations manage their own transactions, so they run here on a
+        # connection of their own before anything else can write
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        migrate(conn)
+        conn.close()
+
+        self.writes = queue.Queue()
+        self.batches = 0
+        self.writer = threading.Thread(
+            target=self._write_loop, name="db-writer", daemon=True
+        )
+        self.writer.start()
+
+        atexit.register(self.close)
+
+    def _connect(self):
+        # Python's sqlite3 keeps a per-connection cache of prepared
+        # statements, so every query is written as a constant string
+        conn = sqlite3.connect(
+            self.path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_MB * 1024}")
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_MB * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _get_connection(self):
+        conn = getattr(self.local, "conn", None)
+
+        if conn is None:
+            conn = self._connect()
+            self.local.conn = conn
+
+        return conn
+
+    def _write_loop(self):
+        conn = self._connect()
+        conn.isolation_level = None
+
+        stopping = False
+        while not stopping:
+            batch = [self.writes.get()]
+
+            # Everything queued up while the last commit ran goes into the
+            # next transaction together
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Each write gets its own savepoint inside the batch's transaction,
+            # so one that fails is undone without taking the others with it
+            conn.execute("BEGIN")
+
+            results = []
+            for item in batch:
+                if item is None:
+                    stopping = True
+                    break
+
+                func, future = item
+                conn.execute("SAVEPOINT write")
+                try:
+                    results.append((future, func(conn), None))
+                except Exception as e:
+                    print(f"Database write failed: {e}")
+                    conn.execute("ROLLBACK TO write")
+                    results.append((future, None, e))
+                conn.execute("RELEASE write")
+
+            conn.commit()
+            self.batches += 1
+
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+        conn.close()
+
+    def run(self, func):
+        # func(conn) runs on the writer thread inside a transaction it must
+        # not commit; the returned Future can be awaited with execute(),
+        # waited on with result(), or ignored
+        future = Future()
+        self.writes.put((func, future))
+        return future
+
+    def submit(self, sql, params=(), many=False):
+        if many:
+            return self.run(lambda conn: conn.executemany(sql, params).rowcount)
+        return self.run(lambda conn: conn.execute(sql, params).rowcount)
+
+    async def execute(self, sql, params=(), many=False):
+        return await asyncio.wrap_future(self.submit(sql, params, many))
+
+    def query(self, sql, params=()):
+        return self._get_connection().execute(sql, params).fetchall()
+
+    async def read(self, func, *args):
+        # Other blocking reads, like the image files a row points to, share
+        # the reader threads so they stay off the event loop too
+        return await asyncio.get_running_loop().run_in_executor(
+            self.readers, func, *args
+        )
+
+    async def fetchall(self, sql, params=()):
+        return await self.read(self.query, sql, params)
+
+    async def fetchone(self, sql, params=()):
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    def close(self):
+        if self.writer.is_alive():
+            self.writes.put(None)
+            self.writer.join()
+
+    def stats(self):
+        return {"queued writes": self.writes.qsize(), "commits": self.batches}
+
+
+storage = Storage(f"../{DB_NAME}", DB_READERS)
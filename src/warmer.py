@@ -0,0 +1,63 @@
+import datetime
+import os
+from nextcord.ext import commands, tasks
+
+from api import scryfall_api
+from ratelimit import rate_limiter
+
+
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL", default=30))
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", default=500))
+WARM_BUDGET = int(os.getenv("WARM_BUDGET", default=50))
+WARM_NEW_SET_DAYS = int(os.getenv("WARM_NEW_SET_DAYS", default=14))
+
+
+class Warmer(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+        self.warm.start()
+
+    def cog_unload(self):
+        self.warm.cancel()
+
+    def _is_busy(self):
+        # Warming only ever uses API capacity nobody else is waiting for
+        return rate_limiter.queue_depth()["api"] > 0
+
+    @tasks.loop(minutes=WARM_INTERVAL)
+    async def warm(self):
+        try:
+            await self._warm()
+        except Exception as e:
+            print(f"Cache warming failed: {e}")
+
+    async def _warm(self):
+        await scryfall_api.flush_hits()
+        budget = WARM_BUDGET
+
+        expiring = await scryfall_api.get_expiring_cards(
+            WARM_TOP_N, datetime.timedelta(minutes=WARM_INTERVAL)
+        )
+        for name, set_code in expiring:
+            if budget <= 0 or self._is_busy():
+                return
+
+            await scryfall_api.refresh_card(name, set_code)
+            budget -= 1
+
+        if budget <= 0 or self._is_busy():
+            return
+
+        new_sets = await scryfall_api.get_new_sets(WARM_NEW_SET_DAYS)
+        budget -= 1
+
+        for set_code in new_sets:
+            if budget <= 0 or self._is_busy():
+                return
+
+            budget -= await scryfall_api.ingest_set(set_code, budget)
+
+    @warm.before_loop
+    async def before_warm(self):
+        await self.bot.wait_until_ready()
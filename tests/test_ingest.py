@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+DATA_DIR = tempfile.TemporaryDirectory()
+os.environ["IMAGE_DIR"] = os.path.join(DATA_DIR.name, "images")
+# Storage opens ../DB_NAME, relative to src/ where the bot is run from
+os.environ["DB_NAME"] = os.path.relpath(
+    os.path.join(DATA_DIR.name, "bot.db"), os.pardir
+)
+
+import bulk
+from bulk import iter_bulk_file
+from ingest import ingest_bulk_file, scryfall_api
+from storage import storage
+
+
+def make_card(name, card_id, released_at="2020-01-01", image_status="highres_scan"):
+    return {
+        "object": "card",
+        "id": card_id,
+        "name": name,
+        "layout": "normal",
+        "released_at": released_at,
+        "image_status": image_status,
+    }
+
+
+def get_row(name):
+    return storage.query(
+        "SELECT rowid, id, image_hash, thumb_hash, face_hashes FROM cards "
+        "WHERE name = ?",
+        [name],
+    )
+
+
+class IterBulkFileTest(unittest.TestCase):
+    def test_objects_split_across_chunks(self):
+        cards = [make_card(f"Card {idx}", f"id-{idx}") for idx in range(5)]
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(cards, f, indent=1)
+        self.addCleanup(os.remove, f.name)
+
+        # Small enough that every object and most strings span several chunks
+        chunk_size, bulk.CHUNK_SIZE = bulk.CHUNK_SIZE, 7
+        try:
+            self.assertEqual(list(iter_bulk_file(f.name)), cards)
+        finally:
+            bulk.CHUNK_SIZE = chunk_size
+
+
+class IngestTest(unittest.IsolatedAsyncioTestCase):
+    async def test_rerun_updates_rows_in_place(self):
+        card = make_card("Rerun Card", "rerun")
+        ruling = {"object": "ruling", "oracle_id": "o-rerun", "comment": "A ruling."}
+        token = dict(make_card("Rerun Token", "token"), layout="token")
+
+        path = os.path.join(DATA_DIR.name, "rerun.json")
+        with open(path, "w") as f:
+            json.dump([card, token, ruling], f)
+
+        self.assertEqual(await ingest_bulk_file(path), 1)
+        rowid = get_row("Rerun Card")[0][0]
+        self.assertEqual(get_row("Rerun Token"), [])
+
+        with open(path, "w") as f:
+            json.dump([dict(card, oracle_text="Updated."), token, ruling], f)
+
+        self.assertEqual(await ingest_bulk_file(path), 1)
+        self.assertEqual(get_row("Rerun Card")[0][:2], (rowid, "rerun"))
+        self.assertEqual(
+            json.loads(
+                storage.query(
+                    "SELECT raw_card FROM cards WHERE name = ?", ["Rerun Card"]
+                )[0][0]
+            )["oracle_text"],
+            "Updated.",
+        )
+        self.assertTrue(scryfall_api.names_complete)
+        self.assertEqual(
+            storage.query("SELECT oracle_id FROM rulings WHERE oracle_id = 'o-rerun'"),
+            [("o-rerun",)],
+        )
+
+    async def test_older_printing_does_not_replace_newer(self):
+        await scryfall_api.ingest_cards([make_card("Reprint", "new", "2021-01-01")])
+        await scryfall_api.ingest_cards([make_card("Reprint", "old", "2019-01-01")])
+        self.assertEqual(get_row("Reprint")[0][1], "new")
+
+        await scryfall_api.ingest_cards([make_card("Reprint", "newer", "2022-01-01")])
+        self.assertEqual(get_row("Reprint")[0][1], "newer")
+
+    async def test_image_hashes_kept_only_for_the_same_scan(self):
+        card = make_card("Scanned", "scanned", image_status="lowres")
+        await scryfall_api.ingest_cards([card])
+
+        async def download_images():
+            await storage.execute(
+                "UPDATE cards SET image_hash = 'image', thumb_hash = 'thumb', "
+                "face_hashes = 'faces' WHERE name = ?",
+                ["Scanned"],
+            )
+
+        await download_images()
+        await scryfall_api.ingest_cards([card])
+        self.assertEqual(get_row("Scanned")[0][2:], ("image", "thumb", "faces"))
+
+        # Scryfall replaced the scan
+        await scryfall_api.ingest_cards([dict(card, image_status="highres_scan")])
+        self.assertEqual(get_row("Scanned")[0][2:], (None, None, None))
+
+        # A newer printing has images of its own
+        await download_images()
+        await scryfall_api.ingest_cards(
+            [make_card("Scanned", "reprint", "2021-01-01", "highres_scan")]
+        )
+        self.assertEqual(get_row("Scanned")[0][1:], ("reprint", None, None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
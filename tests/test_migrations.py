@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+IMAGE_DIR = tempfile.TemporaryDirectory()
+os.environ["IMAGE_DIR"] = IMAGE_DIR.name
+
+import migrations
+from migrations import MIGRATIONS, migrate
+
+
+def get_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+class MigrateTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp_dir.name, "bot.db"))
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp_dir.cleanup()
+
+    def test_fresh_database(self):
+        migrate(self.conn)
+
+        self.assertEqual(get_version(self.conn), len(MIGRATIONS))
+        self.assertIn("normalized_name", get_columns(self.conn, "cards"))
+
+        # Running again with nothing pending changes nothing
+        migrate(self.conn)
+        self.assertEqual(get_version(self.conn), len(MIGRATIONS))
+
+    def test_failed_migration_is_rolled_back_and_retried(self):
+        migrations.MIGRATIONS = MIGRATIONS[:1]
+        try:
+            migrate(self.conn)
+        finally:
+            migrations.MIGRATIONS = MIGRATIONS
+
+        # A card that can't be parsed makes the second migration fail after
+        # it has already altered both tables
+        self.conn.execute(
+            "INSERT INTO cards (name, raw_card) VALUES (?, ?)", ["Broken", "{"]
+        )
+        self.conn.commit()
+        columns = get_columns(self.conn, "cards")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            migrate(self.conn)
+
+        self.assertEqual(get_version(self.conn), 1)
+        self.assertEqual(get_columns(self.conn, "cards"), columns)
+
+        self.conn.execute(
+            "UPDATE cards SET raw_card = ? WHERE name = ?",
+            [json.dumps({"id": "broken", "oracle_id": "o-broken"}), "Broken"],
+        )
+        self.conn.commit()
+        migrate(self.conn)
+
+        self.assertEqual(get_version(self.conn), len(MIGRATIONS))
+        self.assertEqual(
+            self.conn.execute(
+                "SELECT id, normalized_name FROM cards WHERE name = 'Broken'"
+            ).fetchall(),
+            [("broken", "broken")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+IMAGE_DIR = tempfile.TemporaryDirectory()
+os.environ["IMAGE_DIR"] = IMAGE_DIR.name
+
+from migrations import migrate
+import statements
+
+
+# Startup reads that scan on purpose; they only have to avoid sorting into
+# a temporary B-tree
+FULL_LOADS = [
+    "SELECT_ALL_NAMES",
+    "SELECT_BULK_INGEST",
+    "SELECT_MISSES",
+    "SELECT_SETTINGS",
+    "SELECT_WARMED_SETS",
+]
+
+
+def get_plan(conn, sql):
+    params = [None] * sql.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+class QueryPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        migrate(self.conn)
+        self.conn.execute("ANALYZE")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_no_full_scans_or_temporary_sorts(self):
+        names = [name for name in vars(statements) if name.isupper()]
+        self.assertTrue(names)
+
+        for name in names:
+            with self.subTest(name):
+                plan = get_plan(self.conn, getattr(statements, name))
+
+                for step in plan:
+                    # Deduplicating the startup name load is the one sort
+                    # that can't be avoided
+                    if "TEMP B-TREE" in step:
+                        self.assertIn("UNION", step, plan)
+
+                    if step.startswith("SCAN") and name not in FULL_LOADS:
+                        self.assertIn("COVERING INDEX", step, plan)
+
+    def test_lookups_use_normalized_name(self):
+        for name in ["SELECT_CARD", "SELECT_PRINTING"]:
+            plan = get_plan(self.conn, getattr(statements, name))
+            self.assertIn("_normalized_name", " ".join(plan), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()